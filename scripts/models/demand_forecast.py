@@ -0,0 +1,239 @@
+"""
+区级投诉季节性与短期预测
+--------------------------------
+需求重估的投诉权重来自静态的投诉总数。本脚本把 311 鼠患投诉按坐标映射到
+各区、按 `created_date` 汇总为周序列（约 104 周），所有区一起以 (周, 区)
+数组处理：
+
+- 季节指数：周序列除以 52 周中心移动平均，按年内周次取均值、循环平滑并
+  归一化到均值 1，得到乘法季节剖面 (52, 区)；历史只有约两个季节周期、
+  各区周投诉量较小，故各区剖面向全市合计剖面收缩；
+- 去季节后的序列用阻尼 Holt 指数平滑拟合，(α, β) 网格 × 区 在同一个
+  时间循环中向量化求一步预测误差，各区独立选取 SSE 最小的参数；
+- 预测 = (水平 + 阻尼趋势) × 未来周次的季节指数。
+
+预测结果可通过 `reestimate_district_demand.py --forecast-week` 替换静态投诉量，
+再将生成的需求表交给任务1 `--feature-file`，按预测周而非平均周排班。
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+import sys
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.spatial.district_geometry import assign_districts, load_district_polygons
+
+COMPLAINT_FILE = PROJECT_ROOT / "data" / "processed" / "311_rodent_complaints_cleaned.csv"
+FORECAST_FILE = PROJECT_ROOT / "data" / "features" / "district_complaint_forecast.csv"
+PROFILE_FILE = PROJECT_ROOT / "data" / "features" / "district_seasonal_profile.csv"
+
+SEASON_LENGTH = 52
+PROFILE_SMOOTHING = 9  # 季节指数循环平滑窗口（周）
+PROFILE_SHRINKAGE = 0.5  # 区剖面权重，其余取全市合计剖面
+HORIZON_WEEKS = 8
+DAMPING = 0.9
+ALPHA_GRID = np.linspace(0.05, 0.95, 19)
+BETA_GRID = np.linspace(0.0, 0.5, 11)
+
+
+def load_weekly_complaints(path: Path = COMPLAINT_FILE, prefixes=("MN",)) -> pd.DataFrame:
+    """返回 (周 × 区) 的投诉计数表，行索引为周一日期，只保留 7 天完整的周。"""
+    df = pd.read_csv(path).dropna(subset=["latitude", "longitude"])
+    polygons = load_district_polygons(prefixes=list(prefixes))
+    df["district"] = assign_districts(df["longitude"], df["latitude"], polygons)
+    df = df[df["district"] != ""]
+
+    created = pd.to_datetime(df["created_date"])
+    df["week"] = created.dt.to_period("W-SUN").dt.start_time
+    days_covered = created.dt.normalize().groupby(df["week"]).nunique()
+    full_weeks = days_covered[days_covered == 7].index
+
+    counts = df[df["week"].isin(full_weeks)].pivot_table(
+        index="week", columns="district", values="unique_key", aggfunc="count", fill_value=0
+    )
+    counts = counts.reindex(columns=sorted(polygons), fill_value=0)
+    return counts.reindex(pd.date_range(counts.index[0], counts.index[-1], freq="7D"), fill_value=0)
+
+
+def week_of_year(weeks: pd.DatetimeIndex, period: int = SEASON_LENGTH) -> np.ndarray:
+    """年内周次下标 0..period-1，第 53 周并入最后一周。"""
+    return np.minimum(weeks.isocalendar().week.to_numpy(dtype=int), period) - 1
+
+
+def _centered_average(y: np.ndarray, period: int) -> np.ndarray:
+    """沿第 0 维的 2×period 中心移动平均，两端不足处取最近的有效值。"""
+    padded = np.vstack([np.zeros((1,) + y.shape[1:]), np.cumsum(y, axis=0)])
+    ma = (padded[period:] - padded[:-period]) / period  # 长度 T - period + 1
+    centered = 0.5 * (ma[:-1] + ma[1:])  # 长度 T - period
+    half = period // 2
+    out = np.empty_like(y, dtype=float)
+    out[half : half + len(centered)] = centered
+    out[:half] = centered[0]
+    out[half + len(centered) :] = centered[-1]
+    return out
+
+
+def seasonal_profile(
+    y: np.ndarray, woy: np.ndarray, period: int = SEASON_LENGTH, smoothing: int = PROFILE_SMOOTHING
+) -> np.ndarray:
+    """乘法季节指数，形状 (period, 区)，各列均值为 1。"""
+    baseline = _centered_average(y, period) if len(y) > period else y.mean(axis=0, keepdims=True)
+    ratio = y / np.maximum(baseline, 1e-9)
+    sums = np.zeros((period,) + y.shape[1:])
+    np.add.at(sums, woy, ratio)
+    seen = np.bincount(woy, minlength=period)[:, None]
+    profile = np.where(seen > 0, sums / np.maximum(seen, 1), 1.0)
+
+    offsets = np.arange(smoothing) - smoothing // 2
+    profile = np.mean([np.roll(profile, k, axis=0) for k in offsets], axis=0)
+    return profile / profile.mean(axis=0, keepdims=True)
+
+
+def holt_grid(z: np.ndarray, alphas: np.ndarray, betas: np.ndarray, damping: float = DAMPING):
+    """
+    在 (α, β, 区) 数组上同时运行阻尼 Holt 平滑。返回一步预测 SSE 与
+    末期水平、趋势，形状均为 (α, β, 区)。
+    """
+    a = np.asarray(alphas, dtype=float)[:, None, None]
+    b = np.asarray(betas, dtype=float)[None, :, None]
+    shape = (len(a), b.shape[1], z.shape[1])
+    level = np.broadcast_to(z[0], shape).copy()
+    trend = np.zeros(shape)
+    sse = np.zeros(shape)
+    for obs in z[1:]:
+        pred = level + damping * trend
+        err = obs - pred
+        sse += err**2
+        level = pred + a * err
+        trend = damping * trend + a * b * err
+    return sse, level, trend
+
+
+@dataclass
+class ComplaintForecast:
+    districts: np.ndarray  # (区,)
+    profile: np.ndarray  # (52, 区) 季节指数
+    alpha: np.ndarray  # (区,)
+    beta: np.ndarray  # (区,)
+    level: np.ndarray  # (区,) 去季节水平
+    trend: np.ndarray  # (区,)
+    last_week: pd.Timestamp
+
+    def predict(self, horizon: int = HORIZON_WEEKS, damping: float = DAMPING):
+        """返回未来 horizon 周的周一日期与 (周, 区) 投诉预测。"""
+        weeks = pd.date_range(self.last_week + pd.Timedelta(days=7), periods=horizon, freq="7D")
+        steps = np.cumsum(damping ** np.arange(1, horizon + 1))[:, None]
+        base = np.maximum(self.level + steps * self.trend, 0.0)
+        return weeks, base * self.profile[week_of_year(weeks)]
+
+
+def fit_forecast(
+    counts: pd.DataFrame,
+    period: int = SEASON_LENGTH,
+    alphas: Sequence[float] = ALPHA_GRID,
+    betas: Sequence[float] = BETA_GRID,
+    damping: float = DAMPING,
+    shrinkage: float = PROFILE_SHRINKAGE,
+) -> ComplaintForecast:
+    y = counts.to_numpy(dtype=float)
+    woy = week_of_year(counts.index, period)
+    pooled = seasonal_profile(y.sum(axis=1, keepdims=True), woy, period)
+    profile = shrinkage * seasonal_profile(y, woy, period) + (1 - shrinkage) * pooled
+    z = y / profile[woy]
+
+    sse, level, trend = holt_grid(z, np.asarray(alphas), np.asarray(betas), damping)
+    flat = sse.reshape(-1, sse.shape[-1])
+    best = flat.argmin(axis=0)
+    ia, ib = np.unravel_index(best, sse.shape[:2])
+    cols = np.arange(y.shape[1])
+    return ComplaintForecast(
+        districts=counts.columns.to_numpy(),
+        profile=profile,
+        alpha=np.asarray(alphas)[ia],
+        beta=np.asarray(betas)[ib],
+        level=level[ia, ib, cols],
+        trend=trend[ia, ib, cols],
+        last_week=counts.index[-1],
+    )
+
+
+def forecast_for_week(path: Path = FORECAST_FILE, week: Optional[str] = None) -> pd.Series:
+    """读取预测表中包含 week 日期的那一周（默认第一周），返回按区索引的投诉预测。"""
+    df = pd.read_csv(path, parse_dates=["week_start"])
+    if week is None:
+        start = df["week_start"].min()
+    else:
+        day = pd.Timestamp(week)
+        start = day - pd.Timedelta(days=day.weekday())
+        if start not in set(df["week_start"]):
+            raise ValueError(f"{week} 不在预测范围内（{df['week_start'].min():%Y-%m-%d} 起）")
+    rows = df[df["week_start"] == start]
+    return rows.set_index("district")["forecast_complaints"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="区级投诉季节性与短期预测")
+    parser.add_argument("--horizon", type=int, default=HORIZON_WEEKS, help="预测周数")
+    parser.add_argument("--holdout", type=int, default=0, help="留出最后 N 周检验预测误差")
+    parser.add_argument("--forecast-file", type=Path, default=FORECAST_FILE)
+    parser.add_argument("--profile-file", type=Path, default=PROFILE_FILE)
+    args = parser.parse_args()
+
+    counts = load_weekly_complaints()
+    print(
+        f"{len(counts)} 周 × {counts.shape[1]} 区投诉序列"
+        f"（{counts.index[0]:%Y-%m-%d} ~ {counts.index[-1]:%Y-%m-%d}）"
+    )
+
+    if args.holdout > 0:
+        train, test = counts.iloc[: -args.holdout], counts.iloc[-args.holdout :]
+        _, pred = fit_forecast(train).predict(args.holdout)
+        actual = test.to_numpy(dtype=float)
+        static = train.to_numpy(dtype=float).mean(axis=0)
+        print(
+            f"留出 {args.holdout} 周 MAE：季节 + Holt {np.abs(pred - actual).mean():.2f}，"
+            f"平均周 {np.abs(static - actual).mean():.2f}"
+        )
+
+    model = fit_forecast(counts)
+    weeks, pred = model.predict(args.horizon)
+    forecast_df = pd.DataFrame(
+        {
+            "week_start": np.repeat(weeks.strftime("%Y-%m-%d"), len(model.districts)),
+            "district": np.tile(model.districts, len(weeks)),
+            "forecast_complaints": pred.ravel(),
+            "seasonal_index": model.profile[week_of_year(weeks)].ravel(),
+        }
+    )
+    profile_df = pd.DataFrame(
+        {
+            "week_of_year": np.repeat(np.arange(1, SEASON_LENGTH + 1), len(model.districts)),
+            "district": np.tile(model.districts, SEASON_LENGTH),
+            "seasonal_index": model.profile.ravel(),
+        }
+    )
+    for path, table in ((args.forecast_file, forecast_df), (args.profile_file, profile_df)):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table.to_csv(path, index=False)
+
+    print(
+        pd.DataFrame(
+            {"alpha": model.alpha, "beta": model.beta, "next_week": pred[0]},
+            index=model.districts,
+        ).to_string(float_format=lambda v: f"{v:.2f}")
+    )
+    print("已写入季节指数：", args.profile_file)
+    print(f"已写入未来 {args.horizon} 周投诉预测：", args.forecast_file)
+
+
+if __name__ == "__main__":
+    main()
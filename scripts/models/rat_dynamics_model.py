@@ -1,11 +1,19 @@
 """
 Model 2：鼠群动力学微分方程求解器
 用于求解 Task(4) 的老鼠风险参数，并为调度策略提供输入。
+`simulate_rat_batch` 把（区 × 策略 × 参数组）等任意形状的种群
+堆叠为一个状态向量，一次 odeint 调用求解全部轨迹。
+只需要稳态时，`rat_steady_state` 直接给出平衡点的解析解，无需积分。
+重复的单区仿真可通过 `RatSimulationCache`（内存 LRU + 可选磁盘层）复用。
 """
 
+from collections import OrderedDict
+import hashlib
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-from scipy.integrate import odeint
+from scipy.integrate import odeint, solve_ivp
 
 # --- 1. 模型默认参数（可根据实际数据校准） ---
 RAT_MODEL_PARAMS = {
@@ -16,6 +24,13 @@ RAT_MODEL_PARAMS = {
     "H": 100.0,  # 半饱和常数
 }
 
+# 各清运策略下默认的可获取垃圾量 G
+STRATEGY_G = {
+    "AM_BAGS": 1.5,
+    "PM_BAGS": 0.8,
+    "BINS": 0.05,
+}
+
 
 # --- 2. 鼠群动力学微分方程 ---
 def rat_dynamics(N, t, alpha, K, eta, G, delta, H):
@@ -26,36 +41,270 @@ def rat_dynamics(N, t, alpha, K, eta, G, delta, H):
     return logistic_growth + garbage_boost - natural_death
 
 
-# --- 3. 策略驱动的仿真函数 ---
-def simulate_rat_population(
+def rat_steady_state(alpha, K, eta, G, delta, H):
+    """
+    dN/dt = 0 的稳定正根（参数可为数组，按 numpy 规则广播）：
+        N* = K / (2α) · [(α - δ) + sqrt((α - δ)² + 4αF / K)],  F = ηG / (H + G)
+    α < δ 时改用等价的有理化形式 2F / (sqrt(·) - (α - δ))，避免相减抵消。
+    """
+    alpha, K, eta, G, delta, H = (
+        np.asarray(v, dtype=float) for v in (alpha, K, eta, G, delta, H)
+    )
+    forcing = eta * (G / (H + G))
+    net = alpha - delta
+    root = np.sqrt(net**2 + 4 * alpha * forcing / K)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(
+            net >= 0,
+            K / (2 * alpha) * (net + root),
+            2 * forcing / (root - net),
+        )
+
+
+def rat_steady_state_sensitivities(alpha, K, eta, G, delta, H):
+    """
+    稳态对各参数的精确偏导（隐函数定理）：f(N*, p) = 0 ⇒ ∂N*/∂p = f_p / λ，
+    其中稳定根处 f_N = -λ。返回 {参数名: 数组}，形状与参数广播结果一致。
+    """
+    alpha, K, eta, G, delta, H = (
+        np.asarray(v, dtype=float) for v in (alpha, K, eta, G, delta, H)
+    )
+    N, _, rate = _equilibrium_roots(alpha, K, eta, G, delta, H)
+    f_p = {
+        "alpha": N * (1 - N / K),
+        "K": alpha * N**2 / K**2,
+        "eta": G / (H + G),
+        "G": eta * H / (H + G) ** 2,
+        "delta": -N,
+        "H": -eta * G / (H + G) ** 2,
+    }
+    return {name: value / rate for name, value in f_p.items()}
+
+
+def _equilibrium_roots(alpha, K, eta, G, delta, H):
+    """二次方程的两个根 r1 ≥ 0 ≥ r2 以及收敛速率 λ = sqrt((α - δ)² + 4αF / K)。"""
+    alpha, K, eta, G, delta, H = (
+        np.asarray(v, dtype=float) for v in (alpha, K, eta, G, delta, H)
+    )
+    forcing = eta * (G / (H + G))
+    net = alpha - delta
+    rate = np.sqrt(net**2 + 4 * alpha * forcing / K)
+    r1 = rat_steady_state(alpha, K, eta, G, delta, H)
+    r2 = K * net / alpha - r1
+    return r1, r2, rate
+
+
+def rat_closed_form(N0, t, alpha, K, eta, G, delta, H):
+    """
+    常数 G 下的精确解（Riccati 方程）：u = (N - r1) / (N - r2) 满足
+    u(t) = u(0)·exp(-λt)，故 N(t) = (r1 - r2·u) / (1 - u)。参数与 t 均可广播。
+    """
+    r1, r2, rate = _equilibrium_roots(alpha, K, eta, G, delta, H)
+    N0 = np.asarray(N0, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = (N0 - r1) / (N0 - r2) * np.exp(-rate * np.asarray(t, dtype=float))
+        return (r1 - r2 * u) / (1 - u)
+
+
+def rat_segment_map(dt, alpha, K, eta, G, delta, H):
+    """
+    常数 G 区间 [t, t + dt] 上精确解对应的分式线性（Möbius）变换矩阵，
+    形状 (..., 2, 2)：N(t + dt) = (a·N + b) / (c·N + d)。
+    分段常数强迫下，多段演化即为矩阵连乘。
+    """
+    r1, r2, rate = _equilibrium_roots(alpha, K, eta, G, delta, H)
+    e = np.exp(-rate * np.asarray(dt, dtype=float))
+    r1, r2, e = np.broadcast_arrays(r1, r2, e)
+    maps = np.empty(r1.shape + (2, 2))
+    maps[..., 0, 0] = r1 - r2 * e
+    maps[..., 0, 1] = r1 * r2 * (e - 1)
+    maps[..., 1, 0] = 1 - e
+    maps[..., 1, 1] = e * r1 - r2
+    return maps
+
+
+def apply_segment_map(maps, N):
+    """把 rat_segment_map（或其连乘结果）作用到鼠群量 N 上。"""
+    return (maps[..., 0, 0] * N + maps[..., 0, 1]) / (maps[..., 1, 0] * N + maps[..., 1, 1])
+
+
+def time_to_equilibrium(N0, alpha, K, eta, G, delta, H, tol=0.01):
+    """由精确解反推进入平衡点 ±tol 相对误差带所需的天数（已在带内则为 0）。"""
+    r1, r2, rate = _equilibrium_roots(alpha, K, eta, G, delta, H)
+    N0 = np.asarray(N0, dtype=float)
+    edge = r1 * (1 + np.where(N0 > r1, tol, -tol))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u0 = np.abs((N0 - r1) / (N0 - r2))
+        u_edge = np.abs((edge - r1) / (edge - r2))
+        days = np.log(u0 / u_edge) / rate
+    return np.where(u0 > u_edge, days, 0.0)
+
+
+def time_to_threshold(N0, threshold, alpha, K, eta, G, delta, H, direction="below"):
+    """
+    常数 G 下鼠群首次降到（direction="below"）或升到（"above"）threshold 的天数，
+    由精确解 u(t) = u0·exp(-λt) 直接反解，所有参数可广播。
+    起点已满足条件返回 0，平衡点达不到阈值返回 inf。
+    """
+    r1, r2, rate = _equilibrium_roots(alpha, K, eta, G, delta, H)
+    N0 = np.asarray(N0, dtype=float)
+    threshold = np.asarray(threshold, dtype=float)
+    sign = 1.0 if direction == "below" else -1.0
+    satisfied = sign * (N0 - threshold) <= 0
+    reachable = sign * (r1 - threshold) < 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u0 = (N0 - r1) / (N0 - r2)
+        u_thr = (threshold - r1) / (threshold - r2)
+        days = np.log(u0 / u_thr) / rate
+    return np.where(satisfied, 0.0, np.where(reachable, days, np.inf))
+
+
+def time_to_threshold_ode(
     N0,
-    K_i,
+    threshold,
+    horizon,
+    K,
+    G,
+    alpha=None,
+    eta=None,
+    delta=None,
+    H=None,
+    direction="below",
+):
+    """
+    G 随时间变化（G 为可调用对象 G(t)，返回各区数组）时的事件检测版本：
+    每个区一个事件函数，solve_ivp 在积分过程中定位穿越时刻，不分配时间网格。
+    返回各区首次满足条件的天数，horizon 内未满足为 inf。
+    """
+    alpha = RAT_MODEL_PARAMS["alpha"] if alpha is None else alpha
+    eta = RAT_MODEL_PARAMS["eta"] if eta is None else eta
+    delta = RAT_MODEL_PARAMS["delta"] if delta is None else delta
+    H = RAT_MODEL_PARAMS["H"] if H is None else H
+    G_of_t = G if callable(G) else (lambda t: G)
+
+    shape = np.broadcast_shapes(
+        np.shape(N0),
+        np.shape(threshold),
+        np.shape(G_of_t(0.0)),
+        *(np.shape(p) for p in (K, alpha, eta, delta, H)),
+    )
+    N0, threshold = (
+        np.atleast_1d(np.broadcast_to(np.asarray(a, dtype=float), shape)).copy()
+        for a in (N0, threshold)
+    )
+    sign = 1.0 if direction == "below" else -1.0
+
+    def make_event(i):
+        def event(t, N):
+            return sign * (N[i] - threshold[i])
+
+        event.direction = -1.0
+        return event
+
+    events = [make_event(i) for i in range(len(N0))]
+    sol = solve_ivp(
+        lambda t, N: rat_dynamics(N, t, alpha, K, eta, G_of_t(t), delta, H),
+        (0.0, horizon),
+        N0,
+        events=events,
+        t_eval=[],
+        rtol=1e-8,
+        atol=1e-6,
+    )
+    first = np.array([te[0] if len(te) else np.inf for te in sol.t_events])
+    return np.where(sign * (N0 - threshold) <= 0, 0.0, first)
+
+
+def validate_steady_state(alpha, K, eta, G, delta, H, N0=1_500, T_duration=200):
+    """用批量积分的终值检验解析稳态，返回最大相对误差。"""
+    analytic = rat_steady_state(alpha, K, eta, G, delta, H)
+    _, integrated, _ = simulate_rat_batch(
+        N0, K, G, T_duration, 0.5, alpha=alpha, eta=eta, delta=delta, H=H
+    )
+    return float(np.max(np.abs(integrated - analytic) / np.maximum(analytic, 1.0)))
+
+
+def _rat_jacobian_banded(N, t, alpha, K, eta, G, delta, H):
+    """批量系统各种群互不耦合，雅可比矩阵只有主对角线（odeint 带状格式）。"""
+    return np.atleast_2d(alpha * (1 - 2 * N / K) - delta)
+
+
+def simulate_rat_batch(
+    N0,
+    K,
+    G,
     T_duration,
     T_step,
-    strategy="PM_BAGS",
-    strategy_params=None,
+    alpha=None,
+    eta=None,
+    delta=None,
+    H=None,
+    t_eval=None,
 ):
     """
-    模拟单区域在给定清运策略下的鼠群数量轨迹。
-    返回：轨迹数组、稳态值、时间数组。
+    批量积分：N0、K、G 及各模型参数按 numpy 规则广播，例如
+    K[:, None, None]（区）× G[None, :, None]（策略）× alpha[None, None, :]（参数组）。
+    给定 t_eval 时在该时间网格上输出（首点为初值时刻），否则按 T_duration / T_step 生成。
+    返回：轨迹数组 (时间, *形状)、稳态值 (*形状)、时间数组。
     """
+    alpha = RAT_MODEL_PARAMS["alpha"] if alpha is None else alpha
+    eta = RAT_MODEL_PARAMS["eta"] if eta is None else eta
+    delta = RAT_MODEL_PARAMS["delta"] if delta is None else delta
+    H = RAT_MODEL_PARAMS["H"] if H is None else H
+
+    arrays = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (N0, K, G, alpha, eta, delta, H))
+    )
+    shape = arrays[0].shape
+    N0_flat, K_flat, G_flat, alpha_flat, eta_flat, delta_flat, H_flat = (
+        a.ravel() for a in arrays
+    )
+
+    if t_eval is None:
+        t = np.linspace(0, T_duration, int(T_duration / T_step))
+    else:
+        t = np.asarray(t_eval, dtype=float)
+    sol = odeint(
+        rat_dynamics,
+        N0_flat,
+        t,
+        args=(alpha_flat, K_flat, eta_flat, G_flat, delta_flat, H_flat),
+        Dfun=_rat_jacobian_banded,
+        ml=0,
+        mu=0,
+    )
+    trajectories = sol.reshape((len(t),) + shape)
+    return trajectories, trajectories[-1], t
+
 
+# --- 3. 策略驱动的仿真函数 ---
+def _resolve_strategy_params(strategy="PM_BAGS", strategy_params=None):
+    """返回 (G, alpha, eta, delta, H)，strategy_params 中的键覆盖默认值。"""
     strategy_params = strategy_params or {}
 
     # 默认策略影响（可外部覆盖）
-    if strategy == "AM_BAGS":
-        G_available = strategy_params.get("G", 1.5)
-    elif strategy == "PM_BAGS":
-        G_available = strategy_params.get("G", 0.8)
-    elif strategy == "BINS":
-        G_available = strategy_params.get("G", 0.05)
-    else:
-        G_available = strategy_params.get("G", 0.8)
+    G_available = strategy_params.get("G", STRATEGY_G.get(strategy, STRATEGY_G["PM_BAGS"]))
 
     alpha = strategy_params.get("alpha", RAT_MODEL_PARAMS["alpha"])
     eta = strategy_params.get("eta", RAT_MODEL_PARAMS["eta"])
     delta = strategy_params.get("delta", RAT_MODEL_PARAMS["delta"])
     H = strategy_params.get("H", RAT_MODEL_PARAMS["H"])
+    return G_available, alpha, eta, delta, H
+
+
+def simulate_rat_population(
+    N0,
+    K_i,
+    T_duration,
+    T_step,
+    strategy="PM_BAGS",
+    strategy_params=None,
+):
+    """
+    模拟单区域在给定清运策略下的鼠群数量轨迹。
+    返回：轨迹数组、稳态值、时间数组。
+    """
+    G_available, alpha, eta, delta, H = _resolve_strategy_params(strategy, strategy_params)
 
     t = np.linspace(0, T_duration, int(T_duration / T_step))
     sol = odeint(
@@ -68,36 +317,178 @@ def simulate_rat_population(
     return sol.flatten(), steady_state, t
 
 
+class RatSimulationCache:
+    """
+    `simulate_rat_population` / `simulate_rat_batch` 的记忆化包装。键为解析后的
+    全部数值参数 (N0, K, G, α, η, δ, H, 时长, 步长)，因此策略名与显式传入同一 G
+    共享缓存；数组参数按形状与字节内容哈希。内存层为容量 maxsize 的 LRU；
+    给定 cache_dir 时未命中内存的结果再查 / 写磁盘 `.npz`。返回的数组为只读，
+    避免调用方修改缓存内容。
+    """
+
+    def __init__(self, maxsize: int = 256, cache_dir=None):
+        self.maxsize = maxsize
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key_part(value):
+        if value is None or np.ndim(value) == 0:
+            return None if value is None else float(value)
+        array = np.ascontiguousarray(value, dtype=float)
+        return (array.shape, hashlib.sha1(array.tobytes()).hexdigest())
+
+    @classmethod
+    def make_key(cls, N0, K_i, T_duration, T_step, strategy="PM_BAGS", strategy_params=None):
+        resolved = _resolve_strategy_params(strategy, strategy_params)
+        return tuple(cls._key_part(v) for v in (N0, K_i, *resolved, T_duration, T_step))
+
+    @classmethod
+    def make_batch_key(
+        cls, N0, K, G, T_duration, T_step, alpha=None, eta=None, delta=None, H=None, t_eval=None
+    ):
+        params = [
+            RAT_MODEL_PARAMS[name] if value is None else value
+            for name, value in (("alpha", alpha), ("eta", eta), ("delta", delta), ("H", H))
+        ]
+        values = (N0, K, G, *params, T_duration, T_step, t_eval)
+        return ("batch",) + tuple(cls._key_part(v) for v in values)
+
+    def _disk_path(self, key) -> Path:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"rat_{digest}.npz"
+
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _fetch(self, key, compute):
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        if self.cache_dir is not None and self._disk_path(key).exists():
+            self.disk_hits += 1
+            with np.load(self._disk_path(key)) as data:
+                result = (data["trajectory"], data["steady"], data["t"])
+        else:
+            self.misses += 1
+            result = compute()
+            if self.cache_dir is not None:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                np.savez(
+                    self._disk_path(key),
+                    trajectory=result[0],
+                    steady=result[1],
+                    t=result[2],
+                )
+
+        result = tuple(np.asarray(array) for array in result)
+        for array in result:
+            array.setflags(write=False)
+        self._remember(key, result)
+        return result
+
+    def simulate(self, N0, K_i, T_duration, T_step, strategy="PM_BAGS", strategy_params=None):
+        key = self.make_key(N0, K_i, T_duration, T_step, strategy, strategy_params)
+        trajectory, steady, t = self._fetch(
+            key,
+            lambda: simulate_rat_population(
+                N0, K_i, T_duration, T_step, strategy, strategy_params
+            ),
+        )
+        return trajectory, float(steady), t
+
+    def simulate_batch(
+        self, N0, K, G, T_duration, T_step, alpha=None, eta=None, delta=None, H=None, t_eval=None
+    ):
+        """与 `simulate_rat_batch` 相同的接口与返回值。"""
+        key = self.make_batch_key(N0, K, G, T_duration, T_step, alpha, eta, delta, H, t_eval)
+        return self._fetch(
+            key,
+            lambda: simulate_rat_batch(
+                N0, K, G, T_duration, T_step, alpha, eta, delta, H, t_eval
+            ),
+        )
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.disk_hits = self.misses = 0
+
+
+# 模块级默认缓存，供多个脚本共享
+RAT_SIMULATION_CACHE = RatSimulationCache()
+
+
+def cached_simulate_rat_population(
+    N0,
+    K_i,
+    T_duration,
+    T_step,
+    strategy="PM_BAGS",
+    strategy_params=None,
+):
+    """与 `simulate_rat_population` 相同的接口，结果取自默认缓存。"""
+    return RAT_SIMULATION_CACHE.simulate(
+        N0, K_i, T_duration, T_step, strategy, strategy_params
+    )
+
+
+def cached_simulate_rat_batch(N0, K, G, T_duration, T_step, **params):
+    """与 `simulate_rat_batch` 相同的接口，结果取自默认缓存。"""
+    return RAT_SIMULATION_CACHE.simulate_batch(N0, K, G, T_duration, T_step, **params)
+
+
 def run_demo():
     """示例：以 MN03 区为例比较不同策略的稳态鼠群量。"""
     initial_rats = 8_372
     K_mn03 = RAT_MODEL_PARAMS["K_base"] * 1.5
 
-    solution_am, steady_am, t_am = simulate_rat_population(
+    # 两种策略堆叠为一个状态向量，一次积分完成
+    strategies = ["AM_BAGS", "BINS"]
+    solutions, steadies, t_grid = simulate_rat_batch(
         N0=initial_rats,
-        K_i=K_mn03,
+        K=K_mn03,
+        G=np.array([STRATEGY_G[s] for s in strategies]),
         T_duration=30,
         T_step=0.1,
-        strategy="AM_BAGS",
-    )
-    solution_bins, steady_bins, t_bins = simulate_rat_population(
-        N0=initial_rats,
-        K_i=K_mn03,
-        T_duration=30,
-        T_step=0.1,
-        strategy="BINS",
     )
+    steady_am, steady_bins = steadies
 
     print("\n--- Model 2 鼠群动力学示例 (MN03) ---")
     print(f"初始投诉/鼠群量 N0: {initial_rats}")
     print(f"AM 清运稳态鼠群: {steady_am:.0f}")
     print(f"Bins 方案稳态鼠群: {steady_bins:.0f}")
+    analytic = rat_steady_state(
+        RAT_MODEL_PARAMS["alpha"],
+        K_mn03,
+        RAT_MODEL_PARAMS["eta"],
+        np.array([STRATEGY_G[s] for s in strategies]),
+        RAT_MODEL_PARAMS["delta"],
+        RAT_MODEL_PARAMS["H"],
+    )
+    print(f"解析平衡点 (AM / Bins): {analytic[0]:.0f} / {analytic[1]:.0f}")
 
     df = pd.DataFrame(
         {
-            "time_day": t_am,
-            "AM_strategy": solution_am,
-            "BIN_strategy": np.interp(t_am, t_bins, solution_bins),
+            "time_day": t_grid,
+            "AM_strategy": solutions[:, 0],
+            "BIN_strategy": solutions[:, 1],
         }
     )
     return df
@@ -107,3 +498,22 @@ if __name__ == "__main__":
     demo_df = run_demo()
     print("\n前 5 条时间序列：")
     print(demo_df.head())
+
+    # 重复的策略评估直接命中缓存
+    for _ in range(2):
+        for name in STRATEGY_G:
+            cached_simulate_rat_population(8_372, RAT_MODEL_PARAMS["K_base"] * 1.5, 30, 0.1, name)
+    print("\n缓存统计：", RAT_SIMULATION_CACHE.stats())
+
+    # 分区 K 与标量 N0 / 阈值 / G 组合时，事件检测结果应与逐区单独求解一致
+    K_districts = RAT_MODEL_PARAMS["K_base"] * np.array([1.0, 1.5, 2.0])
+    G_bins = STRATEGY_G["BINS"]
+    batch_days = time_to_threshold_ode(1_500, 8_000, 365, K_districts, G_bins, direction="above")
+    single_days = np.concatenate(
+        [
+            time_to_threshold_ode(1_500, 8_000, 365, k, G_bins, direction="above")
+            for k in K_districts
+        ]
+    )
+    assert np.allclose(batch_days, single_days, rtol=1e-4), (batch_days, single_days)
+    print("分区 K 升至 8000 的天数：", np.round(batch_days, 2))
@@ -0,0 +1,174 @@
+"""
+鼠群模型查找表
+--------------------------------
+在 (G, K) 网格上预先计算稳态鼠群量与达到平衡所需天数，写成可内存映射的
+`.npy`（float32，形状 (2, nG, nK)），网格与模型参数保存在同名 `.json` 中。
+查询时做双线性插值，并附带建表时在网格单元中点处测得的最大误差
+（只是插值误差的估计而非严格上界，单元内其他位置的误差可能更大），
+供优化器、策略推荐等内层循环以微秒级代价替代 ODE 求解。
+
+G 轴在饱和坐标 x = G / (H + G) 上等距划分，与垃圾促进项的形状一致。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.rat_dynamics_model import (
+    RAT_MODEL_PARAMS,
+    rat_steady_state,
+    time_to_equilibrium,
+)
+
+OUTPUT_FILE = PROJECT_ROOT / "outputs" / "rat_lookup_table.npy"
+
+G_MAX = 1_000.0
+K_RANGE = (2_000.0, 40_000.0)
+GRID_SIZE = (256, 128)  # (nG, nK)
+INITIAL_N = 1500  # 与任务4.2 的初始鼠群量一致
+EQUILIBRIUM_TOL = 0.01
+QUANTITIES = ("steady_rat", "days_to_equilibrium")
+
+
+def _exact(G, K, params: Dict[str, float], initial_n: float, tol: float) -> np.ndarray:
+    args = (params["alpha"], K, params["eta"], G, params["delta"], params["H"])
+    return np.stack(
+        [
+            rat_steady_state(*args),
+            time_to_equilibrium(initial_n, *args, tol=tol),
+        ]
+    )
+
+
+def build_table(
+    path: Path = OUTPUT_FILE,
+    g_max: float = G_MAX,
+    k_range: Tuple[float, float] = K_RANGE,
+    grid_size: Tuple[int, int] = GRID_SIZE,
+    params: Optional[Dict[str, float]] = None,
+    initial_n: float = INITIAL_N,
+    tol: float = EQUILIBRIUM_TOL,
+) -> Dict:
+    params = {**RAT_MODEL_PARAMS, **(params or {})}
+    n_g, n_k = grid_size
+    x_max = g_max / (params["H"] + g_max)
+    x_axis = np.linspace(0.0, x_max, n_g)
+    k_axis = np.linspace(k_range[0], k_range[1], n_k)
+    g_axis = params["H"] * x_axis / (1 - x_axis)
+
+    values = _exact(g_axis[:, None], k_axis[None, :], params, initial_n, tol)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.float32, shape=values.shape
+    )
+    table[:] = values
+    table.flush()
+
+    # 在网格单元中心处与精确值比较，估计插值误差（非严格上界）
+    x_mid = 0.5 * (x_axis[1:] + x_axis[:-1])
+    k_mid = 0.5 * (k_axis[1:] + k_axis[:-1])
+    g_mid = params["H"] * x_mid / (1 - x_mid)
+    exact_mid = _exact(g_mid[:, None], k_mid[None, :], params, initial_n, tol)
+
+    meta = {
+        "quantities": list(QUANTITIES),
+        "x_axis": [0.0, x_max, n_g],
+        "k_axis": [k_range[0], k_range[1], n_k],
+        "params": {key: params[key] for key in ("alpha", "eta", "delta", "H")},
+        "initial_n": initial_n,
+        "tol": tol,
+    }
+    lookup = RatLookupTable(np.asarray(table), meta)
+    approx_mid = np.stack(lookup.query(g_mid[:, None], k_mid[None, :]))
+    abs_err = np.abs(approx_mid - exact_mid)
+    meta["midpoint_abs_error"] = abs_err.reshape(2, -1).max(axis=1).tolist()
+    meta["midpoint_rel_error"] = (
+        (abs_err / np.maximum(np.abs(exact_mid), 1e-9)).reshape(2, -1).max(axis=1).tolist()
+    )
+
+    with open(path.with_suffix(".json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+@dataclass
+class RatLookupTable:
+    table: np.ndarray  # (2, nG, nK)
+    meta: Dict
+
+    @classmethod
+    def load(cls, path: Path = OUTPUT_FILE) -> "RatLookupTable":
+        with open(path.with_suffix(".json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(np.load(path, mmap_mode="r"), meta)
+
+    @property
+    def midpoint_error(self) -> Dict[str, float]:
+        """建表时各网格单元中点处的最大绝对插值误差，是误差估计而非上界。"""
+        return dict(zip(QUANTITIES, self.meta.get("midpoint_abs_error", [np.nan, np.nan])))
+
+    def query(self, G, K) -> Tuple[np.ndarray, np.ndarray]:
+        """双线性插值，返回 (稳态鼠群量, 达到平衡天数)，G 与 K 可广播。"""
+        H = self.meta["params"]["H"]
+        G, K = np.broadcast_arrays(np.asarray(G, dtype=float), np.asarray(K, dtype=float))
+        x = G / (H + G)
+
+        x_lo, x_hi, n_x = self.meta["x_axis"]
+        k_lo, k_hi, n_k = self.meta["k_axis"]
+        if np.any((x < x_lo) | (x > x_hi)) or np.any((K < k_lo) | (K > k_hi)):
+            raise ValueError("查询点超出查找表范围，请扩大网格后重建")
+
+        fx = (x - x_lo) / (x_hi - x_lo) * (n_x - 1)
+        fk = (K - k_lo) / (k_hi - k_lo) * (n_k - 1)
+        i = np.minimum(fx.astype(int), n_x - 2)
+        j = np.minimum(fk.astype(int), n_k - 2)
+        wx, wk = fx - i, fk - j
+
+        t = self.table
+        values = (
+            t[:, i, j] * (1 - wx) * (1 - wk)
+            + t[:, i + 1, j] * wx * (1 - wk)
+            + t[:, i, j + 1] * (1 - wx) * wk
+            + t[:, i + 1, j + 1] * wx * wk
+        )
+        return values[0], values[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建鼠群模型稳态查找表")
+    parser.add_argument("--output-file", type=Path, default=OUTPUT_FILE)
+    parser.add_argument("--g-max", type=float, default=G_MAX)
+    parser.add_argument("--grid", type=int, nargs=2, default=GRID_SIZE, metavar=("NG", "NK"))
+    args = parser.parse_args()
+
+    meta = build_table(args.output_file, g_max=args.g_max, grid_size=tuple(args.grid))
+    lookup = RatLookupTable.load(args.output_file)
+
+    rng = np.random.default_rng(0)
+    G = rng.uniform(0, args.g_max, 100_000)
+    K = rng.uniform(*K_RANGE, 100_000)
+    start = time.perf_counter()
+    lookup.query(G, K)
+    elapsed = time.perf_counter() - start
+
+    print(f"已写入查找表：{args.output_file}（{args.output_file.stat().st_size / 1024:.0f} KB）")
+    for name, abs_err, rel_err in zip(
+        QUANTITIES, meta["midpoint_abs_error"], meta["midpoint_rel_error"]
+    ):
+        print(f"  {name}: 单元中点插值误差估计 绝对 {abs_err:.3g}，相对 {rel_err:.2e}")
+    print(f"10 万次查询耗时 {elapsed * 1e3:.1f} ms（{elapsed / 1e5 * 1e6:.2f} μs/次）")
+
+
+if __name__ == "__main__":
+    main()
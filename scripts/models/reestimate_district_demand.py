@@ -4,29 +4,43 @@
 基于题干给出的 NYC 日垃圾总量（24M lbs），假设曼哈顿占 20%，
 结合鼠患投诉与小型住宅比例构造需求权重，将日/周垃圾量重新分配
 给 12 个区，并计算 2x/3x 服务频次下的专属卡车需求。
+
+`demand_sweep` 接受曼哈顿占比、投诉/住房权重配比、卡车容量与每日趟数的
+数组，按 (占比, 权重, 容量, 趟数, 区) 一次广播算出全部组合的周垃圾量与
+卡车需求，供敏感性研究直接调用，无需反复运行本脚本。
+
+`--forecast-week` 以 `demand_forecast.py` 的区级周投诉预测替换静态投诉量，
+按预测周重新分配权重（垃圾总量不变），生成的需求表可直接交给任务1。
 """
 
 from __future__ import annotations
 
 import argparse
+from dataclasses import dataclass
 from pathlib import Path
+import sys
+from typing import Sequence
 
 import numpy as np
 import pandas as pd
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
 DEFAULT_FEATURE_FILE = (
     PROJECT_ROOT / "data" / "features" / "district_features_with_mapped_complaints.csv"
 )
 OUTPUT_FILE = (
     PROJECT_ROOT / "data" / "features" / "district_demand_reestimated.csv"
 )
+SWEEP_FILE = PROJECT_ROOT / "data" / "features" / "district_demand_sweep.csv"
 
 NYC_DAILY_WASTE_LBS = 24_000_000  # 题干给定
 MANHATTAN_SHARE = 0.20  # 可调参数
 TRUCK_CAP_TONS = 12.0
 TRIPS_PER_DAY = 2
 DAYS_PER_WEEK = 6
+RODENT_WEIGHT = 0.6  # 投诉权重，住房权重为 1 - RODENT_WEIGHT
 TRUCK_WEEKLY_CAP_TONS = TRUCK_CAP_TONS * TRIPS_PER_DAY * DAYS_PER_WEEK
 
 
@@ -45,31 +59,110 @@ def load_features(path: Path) -> pd.DataFrame:
     return df
 
 
-def build_demand_weights(df: pd.DataFrame) -> pd.Series:
-    rods = df["rodent_complaints"].fillna(0).astype(float)
-    housing = df["buildings_1to9_units_ratio"].fillna(0.0).astype(float)
-
-    if rods.max() == 0:
-        rod_weight = np.ones(len(df))
-    else:
-        rod_weight = rods / rods.max()
-
+def _normalized_features(df: pd.DataFrame):
+    """投诉与小型住宅比例各自按最大值归一化，全零时取 1。"""
+    rods = df["rodent_complaints"].fillna(0).to_numpy(dtype=float)
+    housing = df["buildings_1to9_units_ratio"].fillna(0.0).to_numpy(dtype=float)
+    rod_weight = rods / rods.max() if rods.max() > 0 else np.ones(len(df))
     housing_weight = housing / housing.max() if housing.max() > 0 else np.ones(len(df))
+    return rod_weight, housing_weight
+
 
-    combined = 0.6 * rod_weight + 0.4 * housing_weight
-    combined = combined.replace([np.inf, -np.inf], 0).fillna(0)
-    if combined.sum() == 0:
+def demand_weights(df: pd.DataFrame, rodent_weight=RODENT_WEIGHT) -> np.ndarray:
+    """
+    rodent_weight 可为任意形状数组，返回形状 rodent_weight.shape + (区,) 的
+    归一化权重（沿最后一维求和为 1）。
+    """
+    rod_weight, housing_weight = _normalized_features(df)
+    mix = np.asarray(rodent_weight, dtype=float)[..., None]
+    combined = mix * rod_weight + (1 - mix) * housing_weight
+    combined = np.nan_to_num(combined, nan=0.0, posinf=0.0, neginf=0.0)
+    total = combined.sum(axis=-1, keepdims=True)
+    if (total == 0).any():
         raise ValueError("需求权重全为零，无法分配垃圾量")
-    return combined / combined.sum()
+    return combined / total
 
 
-def compute_truck_need(weekly_tons: pd.Series, pickups_per_week: int) -> pd.Series:
+def build_demand_weights(df: pd.DataFrame, rodent_weight: float = RODENT_WEIGHT) -> pd.Series:
+    return pd.Series(demand_weights(df, rodent_weight), index=df.index)
+
+
+def weekly_tons(daily_lbs):
+    return daily_lbs * 7 / 2000
+
+
+def compute_truck_need(
+    weekly_tons,
+    pickups_per_week,
+    truck_cap_tons=TRUCK_CAP_TONS,
+    trips_per_day=TRIPS_PER_DAY,
+):
+    """专属卡车数，全部参数按 numpy 规则广播。"""
     per_service_tons = weekly_tons / pickups_per_week
-    min_trucks = per_service_tons / (TRUCK_CAP_TONS * TRIPS_PER_DAY)
-    weekly_based = weekly_tons / TRUCK_WEEKLY_CAP_TONS
+    min_trucks = per_service_tons / (truck_cap_tons * trips_per_day)
+    weekly_based = weekly_tons / (truck_cap_tons * trips_per_day * DAYS_PER_WEEK)
     return np.ceil(np.maximum(min_trucks, weekly_based)).astype(int)
 
 
+@dataclass
+class DemandSweep:
+    districts: np.ndarray  # (区,)
+    shares: np.ndarray  # (占比,)
+    rodent_weights: np.ndarray  # (权重,)
+    truck_caps: np.ndarray  # (容量,)
+    trips_per_day: np.ndarray  # (趟数,)
+    weekly_tons: np.ndarray  # (占比, 权重, 区)
+    trucks_2x: np.ndarray  # (占比, 权重, 容量, 趟数, 区)
+    trucks_3x: np.ndarray  # (占比, 权重, 容量, 趟数, 区)
+
+    def to_frame(self) -> pd.DataFrame:
+        """展开为长表，每行一个 (组合, 区)。"""
+        shape = self.trucks_2x.shape
+        idx = np.indices(shape).reshape(len(shape), -1)
+        return pd.DataFrame(
+            {
+                "manhattan_share": self.shares[idx[0]],
+                "rodent_weight": self.rodent_weights[idx[1]],
+                "truck_cap_tons": self.truck_caps[idx[2]],
+                "trips_per_day": self.trips_per_day[idx[3]],
+                "district": self.districts[idx[4]],
+                "weekly_waste_tons_est": self.weekly_tons[idx[0], idx[1], idx[4]],
+                "trucks_needed_2x_est": self.trucks_2x.ravel(),
+                "trucks_needed_3x_est": self.trucks_3x.ravel(),
+            }
+        )
+
+
+def demand_sweep(
+    df: pd.DataFrame,
+    shares: Sequence[float] = (MANHATTAN_SHARE,),
+    rodent_weights: Sequence[float] = (RODENT_WEIGHT,),
+    truck_caps: Sequence[float] = (TRUCK_CAP_TONS,),
+    trips_per_day: Sequence[float] = (TRIPS_PER_DAY,),
+) -> DemandSweep:
+    """所有参数组合的周垃圾量与卡车需求，一次广播计算。"""
+    shares = np.asarray(shares, dtype=float)
+    rodent_weights = np.asarray(rodent_weights, dtype=float)
+    truck_caps = np.asarray(truck_caps, dtype=float)
+    trips = np.asarray(trips_per_day, dtype=float)
+
+    weights = demand_weights(df, rodent_weights)  # (权重, 区)
+    tons = weekly_tons(NYC_DAILY_WASTE_LBS * shares[:, None, None] * weights[None])
+    tons_b = tons[:, :, None, None, :]
+    cap = truck_caps[None, None, :, None, None]
+    trip = trips[None, None, None, :, None]
+    return DemandSweep(
+        districts=df["district"].to_numpy(),
+        shares=shares,
+        rodent_weights=rodent_weights,
+        truck_caps=truck_caps,
+        trips_per_day=trips,
+        weekly_tons=tons,
+        trucks_2x=compute_truck_need(tons_b, 2, cap, trip),
+        trucks_3x=compute_truck_need(tons_b, 3, cap, trip),
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(description="区级垃圾量重估")
     parser.add_argument(
@@ -90,17 +183,64 @@ def main():
         default=MANHATTAN_SHARE,
         help="曼哈顿占纽约市垃圾总量的比例",
     )
+    parser.add_argument("--rodent-weight", type=float, default=RODENT_WEIGHT, help="投诉权重")
+    parser.add_argument(
+        "--forecast-week",
+        default=None,
+        metavar="YYYY-MM-DD",
+        help="以该日期所在周的投诉预测替换静态投诉量；写 next 取预测首周",
+    )
+    parser.add_argument(
+        "--forecast-file", type=Path, default=None, help="投诉预测表，默认取 demand_forecast.py 的输出"
+    )
+    parser.add_argument("--sweep-share", type=float, nargs="+", default=None, metavar="S")
+    parser.add_argument("--sweep-rodent-weight", type=float, nargs="+", default=None, metavar="W")
+    parser.add_argument("--sweep-truck-cap", type=float, nargs="+", default=None, metavar="TONS")
+    parser.add_argument("--sweep-trips", type=float, nargs="+", default=None, metavar="N")
+    parser.add_argument("--sweep-file", type=Path, default=SWEEP_FILE)
     args = parser.parse_args()
 
     df = load_features(args.feature_file)
-    weights = build_demand_weights(df)
+    if args.forecast_week is not None:
+        from scripts.models.demand_forecast import FORECAST_FILE, forecast_for_week
+
+        forecast_file = args.forecast_file or FORECAST_FILE
+        week = None if args.forecast_week == "next" else args.forecast_week
+        forecast = forecast_for_week(forecast_file, week)
+        missing = sorted(set(df["district"]) - set(forecast.index))
+        if missing:
+            raise ValueError(f"投诉预测缺少以下区：{missing}（{forecast_file}）")
+        df["rodent_complaints"] = df["district"].map(forecast)
+        print(f"投诉量取自 {args.forecast_week} 周预测：{forecast_file}")
+
+    sweep_axes = [
+        args.sweep_share,
+        args.sweep_rodent_weight,
+        args.sweep_truck_cap,
+        args.sweep_trips,
+    ]
+    if any(axis is not None for axis in sweep_axes):
+        sweep = demand_sweep(
+            df,
+            args.sweep_share or [args.manhattan_share],
+            args.sweep_rodent_weight or [args.rodent_weight],
+            args.sweep_truck_cap or [TRUCK_CAP_TONS],
+            args.sweep_trips or [TRIPS_PER_DAY],
+        )
+        sweep_df = sweep.to_frame()
+        sweep_df.to_csv(args.sweep_file, index=False)
+        combos = sweep.trucks_2x[..., 0].size
+        print(f"已写入 {combos} 组参数的需求扫描（{len(sweep_df)} 行）：{args.sweep_file}")
+        return
+
+    weights = build_demand_weights(df, args.rodent_weight)
 
     manhattan_daily_lbs = NYC_DAILY_WASTE_LBS * args.manhattan_share
-    manhattan_weekly_tons = manhattan_daily_lbs * 7 / 2000
+    manhattan_weekly_tons = weekly_tons(manhattan_daily_lbs)
 
     df["weight"] = weights
     df["daily_waste_lbs_est"] = manhattan_daily_lbs * weights
-    df["weekly_waste_tons_est"] = df["daily_waste_lbs_est"] * 7 / 2000
+    df["weekly_waste_tons_est"] = weekly_tons(df["daily_waste_lbs_est"])
 
     df["trucks_needed_2x_est"] = compute_truck_need(df["weekly_waste_tons_est"], 2)
     df["trucks_needed_3x_est"] = compute_truck_need(df["weekly_waste_tons_est"], 3)
@@ -0,0 +1,104 @@
+"""
+仿真结果列式读写
+--------------------------------
+仿真脚本通过 `write_table` 输出带类型的列式文件：安装了 pyarrow 时
+写 Parquet，否则写压缩 `.npz`，strategy/scenario 等字符串列以类别编码
+存储。`read_table` 可只加载需要的列，并兼容旧版 CSV 输出。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_COLUMNS = ("strategy", "scenario")
+COLUMNAR_SUFFIXES = (".parquet", ".npz", ".csv")
+_COLUMNS_KEY = "__columns__"
+_CATEGORIES_SUFFIX = "__categories"
+
+
+def has_parquet() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _code_dtype(n_categories: int):
+    return np.int8 if n_categories < 128 else np.int32
+
+
+def write_table(
+    df: pd.DataFrame,
+    path: Path,
+    categorical: Iterable[str] = CATEGORICAL_COLUMNS,
+) -> Path:
+    """按可用后端写出列式结果，返回实际写入的路径（后缀由后端决定）。"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    categorical = [col for col in categorical if col in df.columns]
+
+    if has_parquet():
+        out = path.with_suffix(".parquet")
+        df.astype({col: "category" for col in categorical}).to_parquet(out, index=False)
+        return out
+
+    out = path.with_suffix(".npz")
+    arrays = {_COLUMNS_KEY: np.array(df.columns, dtype=str)}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if (
+            col in categorical
+            or pd.api.types.is_string_dtype(dtype)
+            or pd.api.types.is_object_dtype(dtype)
+        ):
+            codes, categories = pd.factorize(df[col])
+            arrays[col] = codes.astype(_code_dtype(len(categories)))
+            arrays[col + _CATEGORIES_SUFFIX] = np.asarray(categories, dtype=str)
+        else:
+            arrays[col] = df[col].to_numpy()
+    np.savez_compressed(out, **arrays)
+    return out
+
+
+def resolve_table(path: Path) -> Path:
+    """在 .parquet/.npz/.csv 候选中选择最新写出的结果文件。"""
+    path = Path(path)
+    candidates = [path.with_suffix(suffix) for suffix in COLUMNAR_SUFFIXES]
+    existing = [p for p in candidates if p.exists()]
+    if not existing:
+        raise FileNotFoundError(f"找不到仿真结果：{path.with_suffix('')}.*")
+    return max(existing, key=lambda p: p.stat().st_mtime)
+
+
+def _read_npz(path: Path, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    # np.load 对 .npz 按键惰性解压，未请求的列不会被读取
+    with np.load(path, allow_pickle=False) as data:
+        available: List[str] = data[_COLUMNS_KEY].tolist()
+        selected = list(columns) if columns is not None else available
+        missing = set(selected) - set(available)
+        if missing:
+            raise KeyError(f"结果文件缺少列：{missing}")
+
+        result = {}
+        for col in selected:
+            if col + _CATEGORIES_SUFFIX in data.files:
+                result[col] = pd.Categorical.from_codes(
+                    data[col], categories=data[col + _CATEGORIES_SUFFIX]
+                )
+            else:
+                result[col] = data[col]
+    return pd.DataFrame(result, columns=selected)
+
+
+def read_table(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    resolved = resolve_table(path)
+    if resolved.suffix == ".parquet":
+        return pd.read_parquet(resolved, columns=list(columns) if columns else None)
+    if resolved.suffix == ".npz":
+        return _read_npz(resolved, columns)
+    return pd.read_csv(resolved, usecols=list(columns) if columns else None)
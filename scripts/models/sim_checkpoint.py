@@ -0,0 +1,69 @@
+"""
+蒙特卡洛仿真断点续跑
+--------------------------------
+长时间运行的任务3仿真每隔若干次迭代把已完成的记录与随机数发生器
+状态写入检查点；`--resume` 时从检查点恢复，结果与不中断运行完全一致。
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+CHECKPOINT_DIR = PROJECT_ROOT / "outputs" / "checkpoints"
+
+
+def save_checkpoint(path: Path, records: List[Dict], rng: np.random.Generator, config: Dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    state = {
+        "config": config,
+        "records": records,
+        "rng_state": rng.bit_generator.state,
+    }
+    # 先写临时文件再原子替换，避免写到一半中断导致检查点损坏
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: Path, rng: np.random.Generator, config: Dict) -> List[Dict]:
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+    if state["config"] != config:
+        raise ValueError(
+            f"检查点配置与当前运行不一致：{state['config']} != {config}，"
+            "请删除检查点或使用相同参数"
+        )
+    rng.bit_generator.state = state["rng_state"]
+    return state["records"]
+
+
+def run_campaign(
+    step: Callable[[int, np.random.Generator], Dict],
+    num_steps: int,
+    rng: np.random.Generator,
+    checkpoint_file: Path,
+    checkpoint_every: int,
+    resume: bool,
+    config: Dict,
+) -> List[Dict]:
+    """依次执行 step(i, rng)，定期保存检查点；全部完成后删除检查点。"""
+    records: List[Dict] = []
+    if resume and checkpoint_file.exists():
+        records = load_checkpoint(checkpoint_file, rng, config)
+        print(f"从检查点恢复：已完成 {len(records)}/{num_steps} 次仿真")
+
+    for i in range(len(records), num_steps):
+        records.append(step(i, rng))
+        done = i + 1
+        if checkpoint_every > 0 and done % checkpoint_every == 0 and done < num_steps:
+            save_checkpoint(checkpoint_file, records, rng, config)
+
+    checkpoint_file.unlink(missing_ok=True)
+    return records
@@ -0,0 +1,364 @@
+"""
+任务3.4：逐日离散事件仿真
+--------------------------------
+按照任务1 `compute_shared_schedule` 给出的服务日安排，逐日推进
+共享车队的可用车辆、各区未清运垃圾向下一次收运的结转以及加班趟次。
+所有仿真周在数组维度上并行计算，输出各区服务比例的分布。
+
+`--weeks N`（N>1）启用多周模式：场景按马尔可夫链逐周转移，
+未清运垃圾跨周结转，各重复仿真作为数组批量递推。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.task1_frequency_optimizer import (
+    DEFAULT_FEATURE_FILE,
+    SERVICE_DAYS,
+    _truck_col,
+    compute_shared_schedule,
+    enumerate_plans,
+    load_district_data,
+)
+from scripts.models.reestimate_district_demand import TRIPS_PER_DAY, TRUCK_CAP_TONS
+
+SCENARIO_FILE = PROJECT_ROOT / "data" / "scenarios" / "task3_scenarios.json"
+EQUITY_FILE = PROJECT_ROOT / "data" / "features" / "district_equity_targets.csv"
+OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task3_daily_simulation.csv"
+HORIZON_OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task3_markov_backlog.csv"
+
+NUM_WEEKS = 10_000
+NUM_REPLICATIONS = 2_000
+OVERTIME_TRIPS_PER_TRUCK = 1  # 每辆出车车辆当日最多追加的加班趟次
+BASELINE_SCENARIO = "Baseline"  # 多周仿真中视为未中断的场景
+
+
+@dataclass
+class ScheduleArrays:
+    districts: List[str]
+    pickup_mask: np.ndarray  # (区, 服务日)，True 表示当日收运
+    trucks: np.ndarray  # 每次收运派出的卡车数
+    daily_tons: np.ndarray  # 每个服务日新增垃圾量
+    target_tons: np.ndarray  # 周目标清运量
+    fleet_size: int  # 共享车队规模（各日负载峰值）
+
+
+@dataclass
+class ScenarioArrays:
+    names: List[str]
+    probability: np.ndarray
+    vehicle_availability: np.ndarray
+    waste_multiplier: np.ndarray
+    travel_time_multiplier: np.ndarray
+    mean_duration_weeks: np.ndarray
+
+
+def load_scenarios(path: Path = SCENARIO_FILE) -> ScenarioArrays:
+    with open(path, "r", encoding="utf-8") as f:
+        scenarios = json.load(f)
+    probs = np.array([s["probability"] for s in scenarios], dtype=float)
+    return ScenarioArrays(
+        names=[s["name"] for s in scenarios],
+        probability=probs / probs.sum(),
+        vehicle_availability=np.array([s["vehicle_availability"] for s in scenarios]),
+        waste_multiplier=np.array([s["waste_multiplier"] for s in scenarios]),
+        travel_time_multiplier=np.array([s["travel_time_multiplier"] for s in scenarios]),
+        mean_duration_weeks=np.array(
+            [s.get("mean_duration_weeks", 1.0) for s in scenarios], dtype=float
+        ),
+    )
+
+
+def _restart_weights(flow: np.ndarray, tol: float = 1e-12, max_iter: int = 1000) -> np.ndarray:
+    """
+    求重抽权重 w，使“离开 i 后按 w_j / (1 - w_i) 转入 j ≠ i”时各场景的流入等于流出
+    flow_i = π_i / d_i。平衡条件为 w_j ∝ flow_j / (1 - w_j)，以不动点迭代求解。
+    """
+    flow = flow / flow.sum()
+    if flow.max() > 0.5:
+        raise ValueError("某场景的离开流量超过总量一半，无法同时满足平均持续周数与概率，请调整配置")
+    w = flow.copy()
+    for _ in range(max_iter):
+        new = flow / (1.0 - w)
+        new = new / new.sum()
+        if np.abs(new - w).max() < tol:
+            return new
+        w = new
+    return w
+
+
+def transition_matrix(scenarios: ScenarioArrays) -> np.ndarray:
+    """
+    由场景概率与平均持续周数构造逐周转移矩阵。
+    场景 i 以概率 1 - 1/d_i 延续，否则转入其他场景（不含自身），
+    因此平均持续周数恰为 d_i；转入权重由 `_restart_weights` 求得，
+    使平稳分布恰为配置中的 probability。全部 d_i = 1 时不建模持续性，
+    退化为按 probability 独立抽样。
+    """
+    durations = np.maximum(scenarios.mean_duration_weeks, 1.0)
+    n_states = len(durations)
+    if np.all(durations == 1.0):
+        return np.tile(scenarios.probability, (n_states, 1))
+    stay = 1.0 - 1.0 / durations
+    w = _restart_weights(scenarios.probability / durations)
+    restart = np.where(np.eye(n_states, dtype=bool), 0.0, w[None, :])
+    restart = restart / restart.sum(axis=1, keepdims=True)
+    return np.diag(stay) + (1.0 - stay)[:, None] * restart
+
+
+def build_schedule_arrays(df: pd.DataFrame, plan, targets: pd.DataFrame) -> ScheduleArrays:
+    day_loads, assignment = compute_shared_schedule(df, plan)
+    district_map = df.set_index("district")
+    districts = sorted(plan.freq_map)
+
+    pickup_mask = np.zeros((len(districts), len(SERVICE_DAYS)), dtype=bool)
+    trucks = np.zeros(len(districts))
+    for idx, district in enumerate(districts):
+        for day in assignment[district]:
+            pickup_mask[idx, SERVICE_DAYS.index(day)] = True
+        trucks[idx] = district_map.loc[district, _truck_col(plan.freq_map[district])]
+
+    weekly_tons = district_map.loc[districts, "weekly_waste_tons_est"].to_numpy(dtype=float)
+    return ScheduleArrays(
+        districts=districts,
+        pickup_mask=pickup_mask,
+        trucks=trucks,
+        daily_tons=weekly_tons / len(SERVICE_DAYS),
+        target_tons=targets.loc[districts, "target_service_tons"].to_numpy(dtype=float),
+        fleet_size=int(max(day_loads)),
+    )
+
+
+def steady_backlog(schedule: ScheduleArrays) -> np.ndarray:
+    """基准情景下，上周最后一次收运之后累积、留待本周首次收运的垃圾量。"""
+    n_days = len(SERVICE_DAYS)
+    last_pickup = n_days - 1 - np.argmax(schedule.pickup_mask[:, ::-1], axis=1)
+    return schedule.daily_tons * (n_days - 1 - last_pickup)
+
+
+def simulate_weeks(
+    schedule: ScheduleArrays,
+    scenarios: ScenarioArrays,
+    scenario_idx: np.ndarray,
+    rng: np.random.Generator,
+    backlog: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    逐日推进一周的收运过程，第一维为相互独立的仿真周。
+    返回各区清运量、周末结转量与加班趟次。
+    """
+    n_sims = len(scenario_idx)
+    n_districts = len(schedule.districts)
+    if backlog is None:
+        backlog = np.broadcast_to(steady_backlog(schedule), (n_sims, n_districts))
+    backlog = np.array(backlog, dtype=float)
+
+    availability = scenarios.vehicle_availability[scenario_idx]
+    travel = scenarios.travel_time_multiplier[scenario_idx][:, None]
+    generated = schedule.daily_tons * scenarios.waste_multiplier[scenario_idx][:, None]
+    trip_tons = TRUCK_CAP_TONS / travel
+
+    # 每个仿真周、每个服务日共享车队中实际可出车的卡车数
+    trucks_available = rng.binomial(
+        schedule.fleet_size, availability[:, None], size=(n_sims, len(SERVICE_DAYS))
+    )
+
+    served = np.zeros((n_sims, n_districts))
+    overtime_trips = np.zeros(n_sims)
+    for day_idx in range(len(SERVICE_DAYS)):
+        backlog += generated
+        mask = schedule.pickup_mask[:, day_idx]
+        trucks_needed = schedule.trucks[mask].sum()
+        if trucks_needed == 0:
+            continue
+
+        # 可用车辆不足时，当日各区按比例缩减出车数
+        dispatch_ratio = np.minimum(1.0, trucks_available[:, day_idx] / trucks_needed)
+        trucks_out = schedule.trucks[mask] * dispatch_ratio[:, None]
+
+        pending = backlog[:, mask]
+        regular = np.minimum(pending, trucks_out * TRIPS_PER_DAY * trip_tons)
+        remaining = pending - regular
+
+        trips = np.minimum(
+            np.ceil(remaining / trip_tons),
+            np.floor(trucks_out * OVERTIME_TRIPS_PER_TRUCK),
+        )
+        overtime = np.minimum(remaining, trips * trip_tons)
+
+        backlog[:, mask] = remaining - overtime
+        served[:, mask] += regular + overtime
+        overtime_trips += trips.sum(axis=1)
+
+    return {
+        "served_tons": served,
+        "backlog_tons": backlog,
+        "overtime_trips": overtime_trips,
+        "service_ratio": served / schedule.target_tons,
+    }
+
+
+def summarize_ratios(schedule: ScheduleArrays, result: Dict[str, np.ndarray]) -> pd.DataFrame:
+    ratios = result["service_ratio"]
+    quantiles = np.quantile(ratios, [0.05, 0.5, 0.95], axis=0)
+    return pd.DataFrame(
+        {
+            "district": schedule.districts,
+            "mean_service_ratio": ratios.mean(axis=0),
+            "std_service_ratio": ratios.std(axis=0),
+            "p05_service_ratio": quantiles[0],
+            "p50_service_ratio": quantiles[1],
+            "p95_service_ratio": quantiles[2],
+            "prob_below_target": (ratios < 1.0).mean(axis=0),
+            "mean_backlog_tons": result["backlog_tons"].mean(axis=0),
+        }
+    )
+
+
+def simulate_horizon(
+    schedule: ScheduleArrays,
+    scenarios: ScenarioArrays,
+    num_replications: int,
+    num_weeks: int,
+    rng: np.random.Generator,
+) -> Dict[str, np.ndarray]:
+    """
+    多周马尔可夫中断序列仿真：各重复仿真为数组的一行，逐周递推，
+    周末未清运量作为下一周的初始积压。返回 (周, 重复) 维度的结果。
+    """
+    cumulative = np.cumsum(transition_matrix(scenarios), axis=1)
+    n_states = len(scenarios.names)
+    state = rng.choice(n_states, size=num_replications, p=scenarios.probability)
+    backlog = None
+
+    scenario_path = np.empty((num_weeks, num_replications), dtype=np.int8)
+    total_backlog = np.empty((num_weeks, num_replications))
+    min_ratio = np.empty((num_weeks, num_replications))
+    overtime = np.empty((num_weeks, num_replications))
+    ratio_sum = np.zeros((num_replications, len(schedule.districts)))
+
+    for week in range(num_weeks):
+        result = simulate_weeks(schedule, scenarios, state, rng, backlog)
+        backlog = result["backlog_tons"]
+
+        scenario_path[week] = state
+        total_backlog[week] = backlog.sum(axis=1)
+        min_ratio[week] = result["service_ratio"].min(axis=1)
+        overtime[week] = result["overtime_trips"]
+        ratio_sum += result["service_ratio"]
+
+        u = rng.random(num_replications)
+        state = np.minimum((u[:, None] > cumulative[state]).sum(axis=1), n_states - 1)
+
+    return {
+        "scenario": scenario_path,
+        "total_backlog_tons": total_backlog,
+        "min_service_ratio": min_ratio,
+        "overtime_trips": overtime,
+        "mean_service_ratio": ratio_sum / num_weeks,
+    }
+
+
+def summarize_horizon(
+    scenarios: ScenarioArrays,
+    result: Dict[str, np.ndarray],
+    baseline: str = BASELINE_SCENARIO,
+) -> pd.DataFrame:
+    """baseline 不在场景列表中时，以概率最大的场景作为未中断状态。"""
+    if baseline in scenarios.names:
+        baseline_idx = scenarios.names.index(baseline)
+    else:
+        baseline_idx = int(np.argmax(scenarios.probability))
+    backlog_q = np.quantile(result["total_backlog_tons"], [0.05, 0.5, 0.95], axis=1)
+    ratio_q = np.quantile(result["min_service_ratio"], [0.05, 0.5], axis=1)
+    disrupted = result["scenario"] != baseline_idx
+    return pd.DataFrame(
+        {
+            "week": np.arange(1, result["scenario"].shape[0] + 1),
+            "share_disrupted": disrupted.mean(axis=1),
+            "mean_backlog_tons": result["total_backlog_tons"].mean(axis=1),
+            "p05_backlog_tons": backlog_q[0],
+            "p50_backlog_tons": backlog_q[1],
+            "p95_backlog_tons": backlog_q[2],
+            "p05_min_service_ratio": ratio_q[0],
+            "p50_min_service_ratio": ratio_q[1],
+            "mean_overtime_trips": result["overtime_trips"].mean(axis=1),
+        }
+    )
+
+
+def run_horizon(schedule, scenarios, args, rng):
+    start = time.perf_counter()
+    result = simulate_horizon(schedule, scenarios, args.replications, args.weeks, rng)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize_horizon(scenarios, result)
+    output_file = args.output_file or HORIZON_OUTPUT_FILE
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(output_file, index=False)
+
+    print(f"{args.replications} 次重复 × {args.weeks} 周，耗时 {elapsed:.3f} 秒")
+    print("场景转移矩阵：")
+    print(pd.DataFrame(transition_matrix(scenarios), index=scenarios.names,
+                       columns=scenarios.names).round(3).to_string())
+    print(summary.iloc[[0, len(summary) // 2, -1]].to_string(index=False))
+    print("已写入多周积压仿真结果：", output_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务3.4：逐日离散事件仿真")
+    parser.add_argument("--num-weeks", type=int, default=NUM_WEEKS)
+    parser.add_argument(
+        "--weeks",
+        type=int,
+        default=1,
+        help="大于 1 时启用多周马尔可夫中断模式（如 52）",
+    )
+    parser.add_argument("--replications", type=int, default=NUM_REPLICATIONS)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output-file", type=Path, default=None)
+    args = parser.parse_args()
+
+    df = load_district_data(DEFAULT_FEATURE_FILE)
+    plan = enumerate_plans(df, top_k=1)[0]
+    targets = pd.read_csv(EQUITY_FILE).set_index("district")
+    schedule = build_schedule_arrays(df, plan, targets)
+    scenarios = load_scenarios()
+    rng = np.random.default_rng(args.seed)
+
+    if args.weeks > 1:
+        run_horizon(schedule, scenarios, args, rng)
+        return
+
+    start = time.perf_counter()
+    scenario_idx = rng.choice(len(scenarios.names), size=args.num_weeks, p=scenarios.probability)
+    result = simulate_weeks(schedule, scenarios, scenario_idx, rng)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize_ratios(schedule, result)
+    output_file = args.output_file or OUTPUT_FILE
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(output_file, index=False)
+
+    print(f"共享车队 {schedule.fleet_size} 辆，仿真 {args.num_weeks} 周，"
+          f"耗时 {elapsed:.3f} 秒（{args.num_weeks / elapsed:,.0f} 周/秒）")
+    print(f"平均每周加班趟次：{result['overtime_trips'].mean():.1f}")
+    print(summary.to_string(index=False))
+    print("已写入逐日仿真结果：", output_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,12 @@
 1) 危机模式下放宽 MAD（重点保障）；
 2) 垃圾激增时启用额外 20% 共享运力；
 并通过仿真比较服务缺口与最差服务水平。
+长时间运行时定期写检查点，可用 `--resume` 从中断处继续。
 """
 
 from __future__ import annotations
 
+import argparse
 import json
 from pathlib import Path
 from typing import Dict, List
@@ -27,12 +29,18 @@ from scripts.models.task1_frequency_optimizer import (
     load_district_data,
     DEFAULT_FEATURE_FILE,
 )
+from scripts.models.results_io import write_table
+from scripts.models.sim_checkpoint import CHECKPOINT_DIR, run_campaign
 
 SCENARIO_FILE = PROJECT_ROOT / "data" / "scenarios" / "task3_scenarios.json"
 EQUITY_FILE = PROJECT_ROOT / "data" / "features" / "district_equity_targets.csv"
-OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task3_resilience_comparison.csv"
+OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task3_resilience_comparison.parquet"
+
+CHECKPOINT_FILE = CHECKPOINT_DIR / "task3_resilience_comparison.pkl"
 
 NUM_SIMULATIONS = 200
+CHECKPOINT_EVERY = 50
+STRATEGIES = ["Baseline", "PriorityMode", "FlexCapacity"]
 
 
 def load_targets():
@@ -44,71 +52,97 @@ def load_scenarios():
         return json.load(f)
 
 
-def sample_scenario(scenarios):
+def sample_scenario(scenarios, rng: np.random.Generator):
     probs = [s["probability"] for s in scenarios]
-    idx = np.random.choice(len(scenarios), p=probs)
+    idx = rng.choice(len(scenarios), p=probs)
     return scenarios[idx]
 
 
-def simulate(plan, scenarios, targets, strategy: str):
-    records = []
-    for _ in range(NUM_SIMULATIONS):
-        scenario = sample_scenario(scenarios)
-        total_deficit, ratios = 0.0, []
-        min_ratio = 1.0
-
-        capacity_boost = 1.0
-        if strategy == "FlexCapacity" and scenario["name"] == "WasteSpike":
-            capacity_boost = 1.2
-
-        for district, freq in plan.freq_map.items():
-            target = targets.loc[district]["target_service_tons"]
-            base = targets.loc[district]["baseline_service_tons"]
-            service = (
-                freq
-                * base
-                / 2
-                * scenario["vehicle_availability"]
-                * capacity_boost
-                / scenario["travel_time_multiplier"]
-            )
-            service *= 1 / scenario["waste_multiplier"]
-            ratio = service / target
-            min_ratio = min(min_ratio, ratio)
-            ratios.append(ratio)
-            if service < target:
-                total_deficit += target - service
-
-        ratios = np.array(ratios)
-        mad = np.mean(np.abs(ratios - np.mean(ratios)))
-
-        if strategy == "PriorityMode" and scenario["name"] == "SevereWeather":
-            mad = mad * 1.3  # allow higher variance in emergency prioritization
-
-        records.append(
-            {
-                "strategy": strategy,
-                "scenario": scenario["name"],
-                "deficit_tons": total_deficit,
-                "mad": mad,
-                "min_service_ratio": min_ratio,
-            }
+def simulate_once(plan, scenarios, targets, strategy: str, rng: np.random.Generator):
+    scenario = sample_scenario(scenarios, rng)
+    total_deficit, ratios = 0.0, []
+    min_ratio = 1.0
+
+    capacity_boost = 1.0
+    if strategy == "FlexCapacity" and scenario["name"] == "WasteSpike":
+        capacity_boost = 1.2
+
+    for district, freq in plan.freq_map.items():
+        target = targets.loc[district]["target_service_tons"]
+        base = targets.loc[district]["baseline_service_tons"]
+        service = (
+            freq
+            * base
+            / 2
+            * scenario["vehicle_availability"]
+            * capacity_boost
+            / scenario["travel_time_multiplier"]
         )
-    return records
+        service *= 1 / scenario["waste_multiplier"]
+        ratio = service / target
+        min_ratio = min(min_ratio, ratio)
+        ratios.append(ratio)
+        if service < target:
+            total_deficit += target - service
+
+    ratios = np.array(ratios)
+    mad = np.mean(np.abs(ratios - np.mean(ratios)))
+
+    if strategy == "PriorityMode" and scenario["name"] == "SevereWeather":
+        mad = mad * 1.3  # allow higher variance in emergency prioritization
+
+    return {
+        "strategy": strategy,
+        "scenario": scenario["name"],
+        "deficit_tons": total_deficit,
+        "mad": mad,
+        "min_service_ratio": min_ratio,
+    }
 
 
 def main():
+    parser = argparse.ArgumentParser(description="任务3.3：鲁棒性策略对比")
+    parser.add_argument("--num-sims", type=int, default=NUM_SIMULATIONS, help="每种策略的仿真次数")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint-file", type=Path, default=CHECKPOINT_FILE)
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=CHECKPOINT_EVERY,
+        help="每完成多少次仿真保存一次检查点（0 表示不保存）",
+    )
+    parser.add_argument("--resume", action="store_true", help="从最近的检查点继续")
+    args = parser.parse_args()
+
     df = load_district_data(DEFAULT_FEATURE_FILE)
     plan = enumerate_plans(df, top_k=1)[0]
     scenarios = load_scenarios()
     targets = load_targets()
-
-    baseline_records = simulate(plan, scenarios, targets, "Baseline")
-    priority_records = simulate(plan, scenarios, targets, "PriorityMode")
-    flex_records = simulate(plan, scenarios, targets, "FlexCapacity")
-
-    result_df = pd.DataFrame(baseline_records + priority_records + flex_records)
-    result_df.to_csv(OUTPUT_FILE, index=False)
+    rng = np.random.default_rng(args.seed)
+
+    config = {
+        "num_sims": args.num_sims,
+        "seed": args.seed,
+        "strategies": STRATEGIES,
+        "freq_map": plan.freq_map,
+        "scenarios": scenarios,
+    }
+    # 按策略顺序依次仿真
+    records = run_campaign(
+        lambda i, rng: simulate_once(
+            plan, scenarios, targets, STRATEGIES[i // args.num_sims], rng
+        ),
+        args.num_sims * len(STRATEGIES),
+        rng,
+        args.checkpoint_file,
+        args.checkpoint_every,
+        args.resume,
+        config,
+    )
+
+    result_df = pd.DataFrame(records)
+    output_path = write_table(result_df, OUTPUT_FILE)
+    print("已写入策略对比结果：", output_path)
     print(result_df.groupby(["strategy", "scenario"]).agg(["mean", "std"]))
 
 
@@ -3,10 +3,12 @@
 --------------------------------
 基于任务1/2的决策输出与场景配置，运行多次蒙特卡洛仿真，
 评估服务缺口、MAD超限概率等指标。
+长时间运行时定期写检查点，可用 `--resume` 从中断处继续。
 """
 
 from __future__ import annotations
 
+import argparse
 import json
 from pathlib import Path
 import sys
@@ -23,12 +25,17 @@ from scripts.models.task1_frequency_optimizer import (
     load_district_data,
     DEFAULT_FEATURE_FILE,
 )
+from scripts.models.results_io import write_table
+from scripts.models.sim_checkpoint import CHECKPOINT_DIR, run_campaign
 
 SCENARIO_FILE = PROJECT_ROOT / "data" / "scenarios" / "task3_scenarios.json"
 EQUITY_FILE = PROJECT_ROOT / "data" / "features" / "district_equity_targets.csv"
-OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task3_robust_simulation.csv"
+OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task3_robust_simulation.parquet"
+
+CHECKPOINT_FILE = CHECKPOINT_DIR / "task3_robust_simulation.pkl"
 
 NUM_SIMULATIONS = 200
+CHECKPOINT_EVERY = 50
 
 
 def load_scenarios():
@@ -37,9 +44,9 @@ def load_scenarios():
     return scenarios
 
 
-def sample_scenario(scenarios):
+def sample_scenario(scenarios, rng: np.random.Generator):
     probs = [s["probability"] for s in scenarios]
-    choice = np.random.choice(len(scenarios), p=probs)
+    choice = rng.choice(len(scenarios), p=probs)
     return scenarios[choice]
 
 
@@ -48,8 +55,8 @@ def load_targets():
     return df.set_index("district")
 
 
-def simulate_once(plan, scenarios, targets):
-    scenario = sample_scenario(scenarios)
+def simulate_once(plan, scenarios, targets, rng: np.random.Generator):
+    scenario = sample_scenario(scenarios, rng)
     total_deficit = 0.0
     ratios = []
     min_ratio = 1.0
@@ -83,17 +90,44 @@ def simulate_once(plan, scenarios, targets):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="任务3.2：鲁棒性仿真")
+    parser.add_argument("--num-sims", type=int, default=NUM_SIMULATIONS)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint-file", type=Path, default=CHECKPOINT_FILE)
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=CHECKPOINT_EVERY,
+        help="每完成多少次仿真保存一次检查点（0 表示不保存）",
+    )
+    parser.add_argument("--resume", action="store_true", help="从最近的检查点继续")
+    args = parser.parse_args()
+
     df = load_district_data(DEFAULT_FEATURE_FILE)
     plan = enumerate_plans(df, top_k=1)[0]
     scenarios = load_scenarios()
     targets = load_targets()
+    rng = np.random.default_rng(args.seed)
 
-    records: List[Dict[str, float]] = []
-    for _ in range(NUM_SIMULATIONS):
-        records.append(simulate_once(plan, scenarios, targets))
+    config = {
+        "num_sims": args.num_sims,
+        "seed": args.seed,
+        "freq_map": plan.freq_map,
+        "scenarios": scenarios,
+    }
+    records: List[Dict[str, float]] = run_campaign(
+        lambda _, rng: simulate_once(plan, scenarios, targets, rng),
+        args.num_sims,
+        rng,
+        args.checkpoint_file,
+        args.checkpoint_every,
+        args.resume,
+        config,
+    )
 
     result_df = pd.DataFrame(records)
-    result_df.to_csv(OUTPUT_FILE, index=False)
+    output_path = write_table(result_df, OUTPUT_FILE)
+    print("已写入仿真结果：", output_path)
     print("仿真指标统计：")
     print(result_df.describe())
 
@@ -2,7 +2,8 @@
 任务3.1：中断场景配置
 --------------------------------
 定义车辆故障、垃圾激增、天气延误等场景的参数，
-供后续鲁棒性仿真引用。
+供后续鲁棒性仿真引用。`mean_duration_weeks` 为场景的平均持续周数，
+多周仿真据此构造场景间的马尔可夫转移矩阵。
 """
 
 from __future__ import annotations
@@ -23,14 +24,15 @@ class Scenario:
     vehicle_availability: float  # fraction of fleet available
     waste_multiplier: float
     travel_time_multiplier: float
+    mean_duration_weeks: float = 1.0
 
 
 def main():
     scenarios = [
-        Scenario("Baseline", 0.6, 1.0, 1.0, 1.0),
-        Scenario("VehicleFailure", 0.15, 0.85, 1.0, 1.0),
-        Scenario("WasteSpike", 0.15, 1.0, 1.4, 1.0),
-        Scenario("SevereWeather", 0.1, 0.9, 1.2, 1.3),
+        Scenario("Baseline", 0.6, 1.0, 1.0, 1.0, 4.0),
+        Scenario("VehicleFailure", 0.15, 0.85, 1.0, 1.0, 2.0),
+        Scenario("WasteSpike", 0.15, 1.0, 1.4, 1.0, 1.0),
+        Scenario("SevereWeather", 0.1, 0.9, 1.2, 1.3, 1.5),
     ]
 
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
@@ -0,0 +1,193 @@
+"""
+任务3.5：场景参数全局敏感性分析（Sobol/Saltelli）
+------------------------------------------------------
+以任务3.2 的周服务量公式为模型，把中断概率 `probability` 与
+`vehicle_availability`、`waste_multiplier`、`travel_time_multiplier`
+视为不确定输入，输出服务缺口与 MAD 的一阶/总效应 Sobol 指数
+及其自助法置信区间。
+
+模型输出为“基准 / 中断”两状态混合下的期望指标：
+    Y = p · metric(中断参数) + (1 - p) · metric(基准)
+Saltelli 设计的 N × (2k + 2) 个参数点在一次向量化计算中求值。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import sys
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.task1_frequency_optimizer import (
+    DEFAULT_FEATURE_FILE,
+    enumerate_plans,
+    load_district_data,
+)
+
+SCENARIO_FILE = PROJECT_ROOT / "data" / "scenarios" / "task3_scenarios.json"
+EQUITY_FILE = PROJECT_ROOT / "data" / "features" / "district_equity_targets.csv"
+OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task3_sobol_indices.csv"
+
+PARAMETERS = [
+    "probability",
+    "vehicle_availability",
+    "waste_multiplier",
+    "travel_time_multiplier",
+]
+BASE_SAMPLES_LOG2 = 12  # N = 2^12 个基础样本
+NUM_BOOTSTRAP = 500
+CONFIDENCE = 0.95
+PROBABILITY_SPREAD = 0.5  # 中断概率在配置值的 ±50% 内变化
+
+
+def parameter_bounds(scenarios) -> np.ndarray:
+    """由场景配置推出各参数的取值区间，形状 (k, 2)。"""
+    disruption_prob = sum(s["probability"] for s in scenarios if s["name"] != "Baseline")
+    bounds = [
+        (
+            disruption_prob * (1 - PROBABILITY_SPREAD),
+            min(1.0, disruption_prob * (1 + PROBABILITY_SPREAD)),
+        )
+    ]
+    for name in PARAMETERS[1:]:
+        values = [s[name] for s in scenarios]
+        bounds.append((min(values), max(values)))
+    return np.array(bounds, dtype=float)
+
+
+def service_metrics(
+    params: np.ndarray, freq: np.ndarray, base: np.ndarray, target: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """对参数矩阵 (M, k) 批量计算混合期望下的服务缺口与 MAD。"""
+
+    def metrics(service):
+        deficit = np.clip(target - service, 0, None).sum(axis=-1)
+        ratios = service / target
+        mad = np.abs(ratios - ratios.mean(axis=-1, keepdims=True)).mean(axis=-1)
+        return deficit, mad
+
+    prob, availability, waste, travel = params.T
+    nominal = freq * base / 2
+    disrupted = nominal * (availability / travel / waste)[:, None]
+
+    deficit_dis, mad_dis = metrics(disrupted)
+    deficit_base, mad_base = metrics(nominal)
+    return {
+        "deficit_tons": prob * deficit_dis + (1 - prob) * deficit_base,
+        "mad": prob * mad_dis + (1 - prob) * mad_base,
+    }
+
+
+def saltelli_design(bounds: np.ndarray, log2_n: int, seed=None) -> Tuple[np.ndarray, int]:
+    """
+    生成 Saltelli 设计矩阵，按 [A, B, AB_1..AB_k, BA_1..BA_k] 顺序堆叠，
+    返回 (N·(2k+2), k) 的参数矩阵与基础样本数 N。
+    """
+    k = len(bounds)
+    base = qmc.Sobol(d=2 * k, scramble=True, seed=seed).random_base2(log2_n)
+    base = qmc.scale(base, np.tile(bounds[:, 0], 2), np.tile(bounds[:, 1], 2))
+    a, b = base[:, :k], base[:, k:]
+
+    ab = np.repeat(a[None], k, axis=0)
+    ba = np.repeat(b[None], k, axis=0)
+    cols = np.arange(k)
+    ab[cols, :, cols] = b[:, cols].T
+    ba[cols, :, cols] = a[:, cols].T
+    design = np.concatenate([a, b, ab.reshape(-1, k), ba.reshape(-1, k)])
+    return design, len(a)
+
+
+def sobol_indices(y: np.ndarray, n: int, k: int, idx: np.ndarray = None):
+    """
+    由设计矩阵上的模型输出计算一阶 (Saltelli 2010) 与总效应 (Jansen) 指数，
+    同时利用 AB 与 BA 两组矩阵取平均。idx 为自助法重抽样行号 (n_boot, N)。
+    """
+    y_a, y_b = y[:n], y[n : 2 * n]
+    y_ab = y[2 * n : (2 + k) * n].reshape(k, n)
+    y_ba = y[(2 + k) * n :].reshape(k, n)
+    if idx is not None:
+        y_a, y_b = y_a[idx], y_b[idx]
+        y_ab, y_ba = y_ab[:, idx], y_ba[:, idx]
+
+    variance = np.concatenate([y_a, y_b], axis=-1).var(axis=-1)
+    first = 0.5 * (
+        (y_b * (y_ab - y_a)).mean(axis=-1) + (y_a * (y_ba - y_b)).mean(axis=-1)
+    )
+    total = 0.25 * (((y_a - y_ab) ** 2).mean(axis=-1) + ((y_b - y_ba) ** 2).mean(axis=-1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return first / variance, total / variance
+
+
+def analyze(y: np.ndarray, n: int, k: int, rng: np.random.Generator, num_bootstrap: int):
+    s1, st = sobol_indices(y, n, k)
+    idx = rng.integers(0, n, size=(num_bootstrap, n))
+    s1_boot, st_boot = sobol_indices(y, n, k, idx)
+    alpha = (1 - CONFIDENCE) / 2
+    s1_ci = np.quantile(s1_boot, [alpha, 1 - alpha], axis=-1)
+    st_ci = np.quantile(st_boot, [alpha, 1 - alpha], axis=-1)
+    return s1, s1_ci, st, st_ci
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务3.5：Sobol 全局敏感性分析")
+    parser.add_argument("--log2-samples", type=int, default=BASE_SAMPLES_LOG2)
+    parser.add_argument("--bootstrap", type=int, default=NUM_BOOTSTRAP)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output-file", type=Path, default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    df = load_district_data(DEFAULT_FEATURE_FILE)
+    plan = enumerate_plans(df, top_k=1)[0]
+    with open(SCENARIO_FILE, "r", encoding="utf-8") as f:
+        scenarios = json.load(f)
+    targets = pd.read_csv(EQUITY_FILE).set_index("district")
+
+    districts = sorted(plan.freq_map)
+    freq = np.array([plan.freq_map[d] for d in districts], dtype=float)
+    base = targets.loc[districts, "baseline_service_tons"].to_numpy(dtype=float)
+    target = targets.loc[districts, "target_service_tons"].to_numpy(dtype=float)
+
+    bounds = parameter_bounds(scenarios)
+    k = len(PARAMETERS)
+    design, n = saltelli_design(bounds, args.log2_samples, seed=args.seed)
+    outputs = service_metrics(design, freq, base, target)
+    rng = np.random.default_rng(args.seed)
+
+    records = []
+    for metric, y in outputs.items():
+        s1, s1_ci, st, st_ci = analyze(y, n, k, rng, args.bootstrap)
+        for i, name in enumerate(PARAMETERS):
+            records.append(
+                {
+                    "metric": metric,
+                    "parameter": name,
+                    "lower_bound": bounds[i, 0],
+                    "upper_bound": bounds[i, 1],
+                    "S1": s1[i],
+                    "S1_ci_low": s1_ci[0, i],
+                    "S1_ci_high": s1_ci[1, i],
+                    "ST": st[i],
+                    "ST_ci_low": st_ci[0, i],
+                    "ST_ci_high": st_ci[1, i],
+                }
+            )
+
+    out_df = pd.DataFrame(records)
+    args.output_file.parent.mkdir(parents=True, exist_ok=True)
+    out_df.to_csv(args.output_file, index=False)
+
+    print(f"Saltelli 设计：N = {n}，共 {len(design)} 次模型评估")
+    print(out_df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print("已写入敏感性指数：", args.output_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,60 @@
 --------------------------------
 根据频率和 AM/PM 策略估算各区垃圾暴露时间，
 并计算供鼠患模型使用的可获取垃圾量 Gi。
+
+`exposure_grid` 对每个区一次性计算 (频率 × AM/PM × Bins 覆盖率) 的全部组合，
+以 (区, 频率, 窗口, 覆盖率) 四维数组广播求值，输出整洁的长表供优化器使用；
+现行策略表只是该网格上按当前规则取出的一个切片。
+
+`build_hourly_exposure` 按日历逐小时（全年 8760 小时 × 区）给出路边垃圾量：
+由星期几掩码与任务1共享排班得到收运时刻，再按投放窗口与 Bins 覆盖率
+计算暴露量，全部为数组运算；结果既是鼠群模型的 G(t)，也用于暴露 KPI。
+收运时刻 → 累积量 → 可获取量 G 的换算由 `exposure_from_events` 完成，
+任务4.4 的周期周剖面共用同一函数。
 """
 
 from __future__ import annotations
 
+import argparse
 from dataclasses import dataclass
 from pathlib import Path
+import sys
+from typing import Optional, Sequence
 
+import numpy as np
 import pandas as pd
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.task1_frequency_optimizer import (
+    SERVICE_DAYS,
+    PlanResult,
+    compute_shared_schedule,
+)
+
 DEMAND_FILE = PROJECT_ROOT / "data" / "features" / "district_demand_reestimated.csv"
 OUTPUT_FILE = PROJECT_ROOT / "data" / "features" / "district_exposure_estimates.csv"
+GRID_FILE = PROJECT_ROOT / "data" / "features" / "district_exposure_grid.csv"
+HOURLY_KPI_FILE = PROJECT_ROOT / "outputs" / "task4_hourly_exposure_kpis.csv"
+
+# 现行策略规则
+THREE_PER_WEEK_DISTRICTS = {"MN01", "MN06", "MN11"}
+AM_DISTRICTS = {"MN03", "MN04", "MN05", "MN06"}
+HIGH_LOWRISE_RATIO = 0.7  # 1-9 户建筑占比高于该值的区 Bins 覆盖率取高档
+BINS_ADOPTION_HIGH = 0.5
+BINS_ADOPTION_LOW = 0.3
+
+# 策略网格
+FREQUENCIES = (2, 3)
+WINDOWS = ("AM", "PM")
+BINS_ADOPTION_LEVELS = (0.0, 0.3, 0.5, 0.7, 1.0)
+
+# 逐小时日历模型
+COLLECTION_HOUR = 7  # 投放窗口在收运日 7 时结束
+INDOOR_ACCESS = 0.05  # 室内存放期间仍可被老鼠获取的垃圾比例
+CALENDAR_YEAR = 2025
+HOURS_PER_WEEK = 24 * 7
 
 
 @dataclass
@@ -24,43 +66,199 @@ class ExposureParams:
     bins_reduction: float = 0.4  # 容器可获取量降低到40%
 
 
+def effective_exposure(window_hours, bins_adoption, params: ExposureParams):
+    """Bins 覆盖后的有效暴露小时数，参数按 numpy 规则广播。"""
+    return window_hours * (1 - bins_adoption * (1 - params.bins_reduction))
+
+
+def gi_tons(weekly_waste_tons, exposure_hours, freq):
+    """每次收运前可被获取的垃圾量（吨）。"""
+    return weekly_waste_tons * (exposure_hours / 24) / freq
+
+
+def current_strategy(df: pd.DataFrame) -> pd.DataFrame:
+    """按现行规则返回各区的频率、AM/PM 窗口与 Bins 覆盖率。"""
+    district = df["district"]
+    return pd.DataFrame(
+        {
+            "district": district,
+            "freq": np.where(district.isin(THREE_PER_WEEK_DISTRICTS), 3, 2),
+            "strategy": np.where(district.isin(AM_DISTRICTS), "AM", "PM"),
+            "bins_adoption": np.where(
+                df["buildings_1to9_units_ratio"] > HIGH_LOWRISE_RATIO,
+                BINS_ADOPTION_HIGH,
+                BINS_ADOPTION_LOW,
+            ),
+        }
+    )
+
+
+def exposure_grid(
+    df: pd.DataFrame,
+    params: ExposureParams,
+    frequencies: Sequence[int] = FREQUENCIES,
+    windows: Sequence[str] = WINDOWS,
+    adoption_levels: Sequence[float] = BINS_ADOPTION_LEVELS,
+) -> pd.DataFrame:
+    """所有区 × 所有策略组合的暴露时间与 Gi，一次广播计算后展开为长表。"""
+    window_hours = {"AM": params.am_window, "PM": params.pm_window}
+    freq = np.asarray(frequencies, dtype=float)[None, :, None, None]
+    hours = np.array([window_hours[w] for w in windows])[None, None, :, None]
+    adoption = np.asarray(adoption_levels, dtype=float)[None, None, None, :]
+    weekly = df["weekly_waste_tons_est"].to_numpy(dtype=float)[:, None, None, None]
+
+    exposure = effective_exposure(hours, adoption, params)
+    gi = gi_tons(weekly, exposure, freq)
+
+    shape = gi.shape
+    idx = np.indices(shape).reshape(len(shape), -1)
+    return pd.DataFrame(
+        {
+            "district": df["district"].to_numpy()[idx[0]],
+            "freq": np.asarray(frequencies)[idx[1]],
+            "strategy": np.asarray(windows)[idx[2]],
+            "bins_adoption": np.asarray(adoption_levels, dtype=float)[idx[3]],
+            "exposure_hours": np.broadcast_to(hours, shape).ravel(),
+            "effective_exposure": np.broadcast_to(exposure, shape).ravel(),
+            "gi_tons": gi.ravel(),
+        }
+    )
+
+
+def pickup_mask(df: pd.DataFrame) -> np.ndarray:
+    """按任务1共享排班得到 (区, 服务日) 的收运掩码，df 需含 freq 与卡车需求列。"""
+    plan = PlanResult(0, 0, dict(zip(df["district"], df["freq"].astype(int))))
+    _, assignment = compute_shared_schedule(df, plan)
+    mask = np.zeros((len(df), len(SERVICE_DAYS)), dtype=bool)
+    for idx, district in enumerate(df["district"]):
+        for day in assignment[district]:
+            mask[idx, SERVICE_DAYS.index(day)] = True
+    return mask
+
+
+@dataclass
+class HourlyExposure:
+    hours: np.ndarray  # (小时,) datetime64[h]
+    set_out: np.ndarray  # (小时, 区) 是否处于路边投放窗口
+    volume_tons: np.ndarray  # (小时, 区) 自上次收运以来累积的垃圾量
+    available_tons: np.ndarray  # (小时, 区) 老鼠可获取的垃圾量 G(t)
+
+
+def hours_since_event(events: np.ndarray, periodic: bool = False) -> np.ndarray:
+    """
+    沿第 0 维计算距上一次事件的小时数（事件所在小时为 0）。periodic 时序列
+    首尾相接（如一周剖面），否则首个事件之前为 inf。
+    """
+    n = len(events)
+    if periodic:
+        events = np.concatenate([events, events])
+    index = np.arange(len(events))[:, None]
+    last = np.maximum.accumulate(np.where(events, index, -np.inf), axis=0)
+    return (index - last)[-n:]
+
+
+def exposure_from_events(
+    events: np.ndarray, df: pd.DataFrame, params: ExposureParams, periodic: bool = False
+):
+    """
+    由 (小时, 区) 收运事件掩码得到投放窗口掩码、自上次收运以来的累积垃圾量
+    与老鼠可获取量 G：投放窗口内按 Bins 覆盖率折减，其余时间存放于室内、
+    只有 `INDOOR_ACCESS` 可获取。df 需含 weekly_waste_tons_est、strategy、bins_adoption。
+    """
+    since = hours_since_event(events, periodic)
+    until = hours_since_event(events[::-1], periodic)[::-1]
+    hourly_tons = df["weekly_waste_tons_est"].to_numpy(dtype=float) / HOURS_PER_WEEK
+    volume = hourly_tons * since
+
+    window = np.where(df["strategy"] == "AM", params.am_window, params.pm_window)
+    bins_factor = 1 - df["bins_adoption"].to_numpy(dtype=float) * (1 - params.bins_reduction)
+    set_out = (until > 0) & (until <= window)
+    available = volume * np.where(set_out, bins_factor, INDOOR_ACCESS)
+    return set_out, volume, available
+
+
+def build_hourly_exposure(
+    df: pd.DataFrame,
+    params: ExposureParams,
+    mask: np.ndarray,
+    year: int = CALENDAR_YEAR,
+    holidays: Optional[Sequence[str]] = None,
+) -> HourlyExposure:
+    """
+    逐小时日历暴露模型。df 需含 weekly_waste_tons_est、strategy、bins_adoption；
+    mask 为 (区, 服务日) 收运掩码。holidays 中的日期不收运，垃圾顺延累积。
+    日历前后各补一周，保证年初、年末的累积量与投放窗口完整。
+    """
+    start = np.datetime64(f"{year}-01-01T00", "h")
+    end = np.datetime64(f"{year + 1}-01-01T00", "h")
+    hours = np.arange(start - HOURS_PER_WEEK, end + HOURS_PER_WEEK, dtype="datetime64[h]")
+    days = hours.astype("datetime64[D]")
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 为周四，周一为 0
+    hour_of_day = hours.astype(np.int64) % 24
+
+    service = np.zeros((len(hours), len(df)), dtype=bool)
+    workday = weekday < len(SERVICE_DAYS)
+    service[workday] = mask.T[weekday[workday]]
+    if holidays:
+        service[np.isin(days, np.array(holidays, dtype="datetime64[D]"))] = False
+    events = service & (hour_of_day == COLLECTION_HOUR)[:, None]
+    set_out, volume, available = exposure_from_events(events, df, params)
+
+    keep = slice(HOURS_PER_WEEK, len(hours) - HOURS_PER_WEEK)
+    return HourlyExposure(hours[keep], set_out[keep], volume[keep], available[keep])
+
+
+def hourly_exposure_kpis(df: pd.DataFrame, exposure: HourlyExposure) -> pd.DataFrame:
+    curb_tons = np.where(exposure.set_out, exposure.available_tons, 0.0)
+    previous = np.zeros_like(exposure.set_out)
+    previous[1:] = exposure.set_out[:-1]
+    set_out_starts = exposure.set_out & ~previous  # 跨年初仍在投放的窗口计为一次开始
+    return pd.DataFrame(
+        {
+            "district": df["district"].to_numpy(),
+            "set_outs_per_year": set_out_starts.sum(axis=0),
+            "exposure_hours_per_year": exposure.set_out.sum(axis=0),
+            "exposed_ton_hours": curb_tons.sum(axis=0),
+            "peak_curb_tons": curb_tons.max(axis=0),
+            "mean_available_tons": exposure.available_tons.mean(axis=0),
+        }
+    )
+
+
 def main():
+    parser = argparse.ArgumentParser(description="任务4.1：暴露时间与 Gi 计算")
+    parser.add_argument("--output-file", type=Path, default=OUTPUT_FILE)
+    parser.add_argument("--grid-file", type=Path, default=GRID_FILE)
+    parser.add_argument("--year", type=int, default=CALENDAR_YEAR)
+    parser.add_argument(
+        "--holiday", action="append", default=[], metavar="YYYY-MM-DD", help="停收日期，可重复"
+    )
+    parser.add_argument("--kpi-file", type=Path, default=HOURLY_KPI_FILE)
+    args = parser.parse_args()
+
     df = pd.read_csv(DEMAND_FILE)
     params = ExposureParams()
 
-    results = []
-    for _, row in df.iterrows():
-        district = row["district"]
-        freq = 3 if district in {"MN01", "MN06", "MN11"} else 2
-        strategy = "AM" if district in {"MN03", "MN04", "MN05", "MN06"} else "PM"
-        bins_adoption = 0.5 if row["buildings_1to9_units_ratio"] > 0.7 else 0.3
-
-        if strategy == "AM":
-            exposure_hours = params.am_window
-        else:
-            exposure_hours = params.pm_window
-
-        effective_exposure = exposure_hours * (1 - bins_adoption * (1 - params.bins_reduction))
-        gi = row["weekly_waste_tons_est"] * (effective_exposure / 24) / freq
-
-        results.append(
-            {
-                "district": district,
-                "freq": freq,
-                "strategy": strategy,
-                "bins_adoption": bins_adoption,
-                "exposure_hours": exposure_hours,
-                "effective_exposure": effective_exposure,
-                "gi_tons": gi,
-            }
-        )
-
-    out_df = pd.DataFrame(results)
-    out_df.to_csv(OUTPUT_FILE, index=False)
-    print(f"已写入暴露时间估计：{OUTPUT_FILE}")
+    current = current_strategy(df)
+    levels = sorted(set(BINS_ADOPTION_LEVELS) | set(current["bins_adoption"]))
+    grid = exposure_grid(df, params, adoption_levels=levels)
+    grid.to_csv(args.grid_file, index=False)
 
+    # 现行策略即网格上的一个切片
+    out_df = current.merge(grid, on=["district", "freq", "strategy", "bins_adoption"], how="left")
+    out_df.to_csv(args.output_file, index=False)
+    print(f"已写入暴露时间估计：{args.output_file}")
+    print(f"已写入策略网格（{len(grid)} 行）：{args.grid_file}")
 
-if __name__ == "__main__":
-    main()
+    schedule_df = df.merge(out_df[["district", "freq", "strategy", "bins_adoption"]], on="district")
+    hourly = build_hourly_exposure(
+        schedule_df, params, pickup_mask(schedule_df), args.year, args.holiday
+    )
+    kpis = hourly_exposure_kpis(schedule_df, hourly)
+    args.kpi_file.parent.mkdir(parents=True, exist_ok=True)
+    kpis.to_csv(args.kpi_file, index=False)
+    print(f"已写入 {args.year} 年逐小时暴露 KPI：{args.kpi_file}")
 
 
+if __name__ == "__main__":
+    main()
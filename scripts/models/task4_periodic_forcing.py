@@ -0,0 +1,158 @@
+"""
+任务4.4：收运排班驱动的周期性垃圾强迫 G(t)
+------------------------------------------------
+任务4.2 把每个区的可获取垃圾量 G 视为常数。实际上垃圾在两次收运之间
+不断累积，收运后归零；只有在 `ExposureParams` 给出的 AM/PM 投放窗口内
+（窗口在次日 7 时收运时结束）才完全暴露在路边，其余时间存放于室内。
+
+本脚本按 `compute_shared_schedule` 的服务日生成逐小时 G(t)（与任务4.1 共用
+`exposure_from_events` 换算可获取量），在每个小时内 G 取常数，用鼠群方程的
+精确分段解（Möbius 变换）推进。一周 168 段的变换矩阵只计算一次，全年轨迹
+由周变换的迭代与周内前缀积一次广播得到。
+`--calendar-year` 时改用任务4.1 的逐小时日历暴露模型（含停收日），
+逐段推进全年 8760 小时。
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.rat_dynamics_model import (
+    RAT_MODEL_PARAMS,
+    apply_segment_map,
+    rat_segment_map,
+    rat_steady_state,
+)
+from scripts.models.task4_exposure_time import (
+    COLLECTION_HOUR,
+    HOURS_PER_WEEK,
+    ExposureParams,
+    build_hourly_exposure,
+    exposure_from_events,
+    pickup_mask,
+)
+
+DEMAND_FILE = PROJECT_ROOT / "data" / "features" / "district_demand_reestimated.csv"
+EXPOSURE_FILE = PROJECT_ROOT / "data" / "features" / "district_exposure_estimates.csv"
+OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task4_periodic_rat_levels.csv"
+
+HOURS_PER_YEAR = 24 * 365
+DT_DAYS = 1 / 24
+INITIAL_N = 1500
+
+
+def load_current_strategy() -> pd.DataFrame:
+    demand_df = pd.read_csv(DEMAND_FILE)
+    exposure_df = pd.read_csv(EXPOSURE_FILE)[["district", "freq", "strategy", "bins_adoption"]]
+    merged = demand_df.merge(exposure_df, on="district", how="inner")
+    return merged.sort_values("district").reset_index(drop=True)
+
+
+def weekly_forcing_profile(df: pd.DataFrame, params: ExposureParams) -> np.ndarray:
+    """返回一周 168 小时 × 区 的可获取垃圾量 G（吨）。"""
+    days = pickup_mask(df)
+    events = np.zeros((HOURS_PER_WEEK, len(df)), dtype=bool)
+    day_idx, district_idx = np.nonzero(days.T)
+    events[day_idx * 24 + COLLECTION_HOUR, district_idx] = True
+    _, _, available = exposure_from_events(events, df, params, periodic=True)
+    return available
+
+
+def _model_args(G, K=None):
+    params = RAT_MODEL_PARAMS
+    K = params["K_base"] if K is None else K
+    return params["alpha"], K, params["eta"], G, params["delta"], params["H"]
+
+
+def integrate_piecewise(N0, G: np.ndarray, dt: float = DT_DAYS, K=None) -> np.ndarray:
+    """任意逐段常数强迫 G (段, 区) 下逐段推进，返回每段末的鼠群量。"""
+    maps = rat_segment_map(dt, *_model_args(G, K))
+    out = np.empty(G.shape)
+    N = np.broadcast_to(np.asarray(N0, dtype=float), G.shape[1:])
+    for step in range(len(G)):
+        N = apply_segment_map(maps[step], N)
+        out[step] = N
+    return out
+
+
+def integrate_periodic(
+    N0, G_period: np.ndarray, n_periods: int, dt: float = DT_DAYS, K=None
+) -> np.ndarray:
+    """
+    周期强迫：一个周期内各段变换的前缀积只算一次（每步归一化防止溢出），
+    周期起点状态由整周期变换迭代得到，再一次广播出全部轨迹。
+    返回 (n_periods · 段数, 区)。
+    """
+    maps = rat_segment_map(dt, *_model_args(G_period, K))
+    prefix = np.empty_like(maps)
+    acc = np.broadcast_to(np.eye(2), maps.shape[1:]).copy()
+    for step in range(len(maps)):
+        acc = maps[step] @ acc
+        acc /= np.abs(acc).max(axis=(-2, -1), keepdims=True)
+        prefix[step] = acc
+
+    starts = np.empty((n_periods,) + G_period.shape[1:])
+    N = np.broadcast_to(np.asarray(N0, dtype=float), G_period.shape[1:])
+    for period in range(n_periods):
+        starts[period] = N
+        N = apply_segment_map(prefix[-1], N)
+
+    trajectory = apply_segment_map(prefix[None], starts[:, None])
+    return trajectory.reshape((-1,) + G_period.shape[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务4.4：周期性垃圾强迫下的鼠群仿真")
+    parser.add_argument(
+        "--calendar-year", type=int, default=None, help="按该年日历逐小时构建 G(t)"
+    )
+    parser.add_argument("--output-file", type=Path, default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    df = load_current_strategy()
+    params = ExposureParams()
+
+    start = time.perf_counter()
+    if args.calendar_year is None:
+        # 周剖面即一个完整周期，其统计量与全年相同
+        G = weekly_forcing_profile(df, params)
+        n_weeks = -(-HOURS_PER_YEAR // HOURS_PER_WEEK)
+        trajectory = integrate_periodic(INITIAL_N, G, n_weeks)[:HOURS_PER_YEAR]
+    else:
+        G = build_hourly_exposure(df, params, pickup_mask(df), args.calendar_year).available_tons
+        trajectory = integrate_piecewise(INITIAL_N, G)
+    elapsed = time.perf_counter() - start
+
+    last_week = trajectory[-HOURS_PER_WEEK:]
+    out_df = pd.DataFrame(
+        {
+            "district": df["district"],
+            "freq": df["freq"],
+            "strategy": df["strategy"],
+            "mean_g_tons": G.mean(axis=0),
+            "peak_g_tons": G.max(axis=0),
+            "mean_rat": last_week.mean(axis=0),
+            "min_rat": last_week.min(axis=0),
+            "max_rat": last_week.max(axis=0),
+            "constant_g_steady_rat": rat_steady_state(*_model_args(G.mean(axis=0))),
+        }
+    )
+    args.output_file.parent.mkdir(parents=True, exist_ok=True)
+    out_df.to_csv(args.output_file, index=False)
+
+    print(f"{len(df)} 个区全年逐小时强迫仿真耗时 {elapsed * 1e3:.1f} ms")
+    print(out_df.to_string(index=False))
+    print("已写入周期强迫鼠群结果：", args.output_file)
+
+
+if __name__ == "__main__":
+    main()
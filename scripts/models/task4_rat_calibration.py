@@ -0,0 +1,205 @@
+"""
+任务4.5：鼠群模型参数标定
+--------------------------------
+`RAT_MODEL_PARAMS` 为人工设定值，任务4.2 的初始鼠群量也固定为 1500。
+本脚本把 311 鼠患投诉按坐标映射到各区，汇总为月度序列（以投诉量作为
+鼠群代理，与 Model 2 的口径一致；全体区的平均月投诉量对齐到任务4.2 的
+`baseline_n = 1500`，使其与 `K_base` 处于同一量级），逐区标定 α、η、δ、H：
+
+- 参数取对数后拟合，并对 `RAT_MODEL_PARAMS` 施加弱先验，缓解可辨识性不足；
+- 状态与前向敏感度方程 dS/dt = f_N·S + f_θ 合并为一个向量，
+  所有区在一次批量积分中同时得到轨迹与雅可比矩阵；
+- 所有区的参数在一次 `least_squares` 调用中联合求解（雅可比为块对角稀疏矩阵），
+  再由各区块的 (JᵀJ)⁻¹ 给出标准误与 95% 置信区间。
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.integrate import odeint
+from scipy.optimize import least_squares
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.rat_dynamics_model import RAT_MODEL_PARAMS, rat_dynamics
+from scripts.spatial.district_geometry import assign_districts, load_district_polygons
+
+COMPLAINT_FILE = PROJECT_ROOT / "data" / "processed" / "311_rodent_complaints_cleaned.csv"
+EXPOSURE_FILE = PROJECT_ROOT / "data" / "features" / "district_exposure_estimates.csv"
+OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task4_rat_calibration.csv"
+
+FIT_PARAMS = ["alpha", "eta", "delta", "H"]
+PRIOR_LOG_SD = 1.0  # 对数参数先验标准差（约一个数量级的 e 倍）
+DAYS_PER_MONTH = 365.25 / 12
+MIN_DAYS_PER_MONTH = 25  # 首尾不完整月份不参与拟合
+BASELINE_N = 1500  # 任务4.2 的初始鼠群量，平均月投诉量对齐到该值
+
+
+def load_monthly_complaints(path: Path = COMPLAINT_FILE) -> pd.DataFrame:
+    """返回 (月份 × 区) 的投诉计数表，只保留覆盖完整的月份。"""
+    df = pd.read_csv(path).dropna(subset=["latitude", "longitude"])
+    polygons = load_district_polygons(prefixes=["MN"])
+    df["district"] = assign_districts(df["longitude"], df["latitude"], polygons)
+    df = df[df["district"] != ""]
+
+    created = pd.to_datetime(df["created_date"])
+    df["month"] = created.dt.to_period("M")
+    days_covered = created.groupby(df["month"]).agg(lambda s: s.dt.day.nunique())
+    full_months = days_covered[days_covered >= MIN_DAYS_PER_MONTH].index
+
+    counts = df[df["month"].isin(full_months)].pivot_table(
+        index="month", columns="district", values="unique_key", aggfunc="count", fill_value=0
+    )
+    return counts.reindex(columns=sorted(polygons), fill_value=0)
+
+
+def _augmented_rhs(y, t, alpha, K, eta, G, delta, H):
+    """状态 N 与 4 个对数参数敏感度 S = ∂N/∂log θ 的联合右端项。"""
+    state = y.reshape(len(G), 5)
+    N, S = state[:, 0], state[:, 1:]
+    saturation = G / (H + G)
+
+    dN = rat_dynamics(N, t, alpha, K, eta, G, delta, H)
+    f_N = alpha * (1 - 2 * N / K) - delta
+    f_theta = np.stack(
+        [
+            alpha * N * (1 - N / K),
+            eta * saturation,
+            -delta * N,
+            -eta * saturation * H / (H + G),
+        ],
+        axis=1,
+    )
+    dS = f_N[:, None] * S + f_theta
+    return np.concatenate([dN[:, None], dS], axis=1).ravel()
+
+
+def simulate_with_sensitivity(log_theta: np.ndarray, N0, K, G, t):
+    """批量积分所有区，返回轨迹 (时间, 区) 与敏感度 (时间, 区, 4)。"""
+    n_districts = len(N0)
+    alpha, eta, delta, H = np.exp(log_theta).T
+    y0 = np.zeros((n_districts, 5))
+    y0[:, 0] = N0
+    sol = odeint(
+        _augmented_rhs,
+        y0.ravel(),
+        t,
+        args=(alpha, K, eta, G, delta, H),
+        rtol=1e-8,
+        atol=1e-6,
+        mxstep=5000,
+    )
+    sol = sol.reshape(len(t), n_districts, 5)
+    return sol[:, :, 0], sol[:, :, 1:]
+
+
+def calibrate(counts: pd.DataFrame, gi: np.ndarray, K=None, scale: float = 1.0):
+    """
+    联合标定所有区，返回 (对数参数 (区, 4), 对数参数标准误, 拟合轨迹, 优化结果)。
+    scale 为投诉量到鼠群量的换算系数，拟合轨迹与 K 同单位。
+    """
+    K = RAT_MODEL_PARAMS["K_base"] if K is None else K
+    raw = counts.to_numpy(dtype=float)
+    y = raw * scale
+    n_months, n_districts = y.shape
+    t = np.arange(n_months) * DAYS_PER_MONTH
+    N0 = y[0]
+    weight = 1 / (scale * np.sqrt(np.maximum(raw, 1.0)))  # 近似泊松误差
+
+    prior = np.log([RAT_MODEL_PARAMS[name] for name in FIT_PARAMS])
+    n_params = len(FIT_PARAMS)
+    row_blocks = np.arange(n_months)[:, None] * n_districts + np.arange(n_districts)
+    col_of = lambda d: d * n_params + np.arange(n_params)
+
+    cache = {}
+
+    def evaluate(x):
+        key = x.tobytes()
+        if key not in cache:
+            cache.clear()
+            cache[key] = simulate_with_sensitivity(x.reshape(n_districts, n_params), N0, K, gi, t)
+        return cache[key]
+
+    def residuals(x):
+        N, _ = evaluate(x)
+        data_res = ((N - y) * weight).ravel()
+        prior_res = ((x.reshape(n_districts, n_params) - prior) / PRIOR_LOG_SD).ravel()
+        return np.concatenate([data_res, prior_res])
+
+    def jacobian(x):
+        _, S = evaluate(x)
+        rows = np.repeat(row_blocks.ravel(), n_params)
+        cols = np.concatenate([col_of(d) for d in range(n_districts)])
+        cols = np.tile(cols, n_months)
+        data_jac = sparse.csr_matrix(
+            ((S * weight[:, :, None]).ravel(), (rows, cols)),
+            shape=(n_months * n_districts, n_districts * n_params),
+        )
+        prior_jac = sparse.identity(n_districts * n_params, format="csr") / PRIOR_LOG_SD
+        return sparse.vstack([data_jac, prior_jac], format="csr")
+
+    x0 = np.tile(prior, n_districts)
+    fit = least_squares(residuals, x0, jac=jacobian, method="trf", tr_solver="lsmr")
+
+    log_theta = fit.x.reshape(n_districts, n_params)
+    N_fit, S = evaluate(fit.x)
+
+    # 各区块独立：协方差 = s² (JᵀJ)⁻¹，s² 取该区加权残差方差
+    data_res = (N_fit - y) * weight
+    dof = max(n_months - n_params, 1)
+    s2 = (data_res**2).sum(axis=0) / dof
+    JtJ = np.einsum("mdi,mdj->dij", S * weight[:, :, None], S * weight[:, :, None])
+    JtJ += np.eye(n_params) / PRIOR_LOG_SD**2
+    cov = np.linalg.inv(JtJ) * s2[:, None, None]
+    log_se = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+    return log_theta, log_se, N_fit, fit
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务4.5：鼠群模型参数标定")
+    parser.add_argument("--output-file", type=Path, default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    counts = load_monthly_complaints()
+    exposure = pd.read_csv(EXPOSURE_FILE).set_index("district")
+    counts = counts[[d for d in counts.columns if d in exposure.index]]
+    gi = exposure.loc[counts.columns, "gi_tons"].to_numpy(dtype=float)
+
+    scale = BASELINE_N / counts.to_numpy(dtype=float).mean()
+    log_theta, log_se, N_fit, fit = calibrate(counts, gi, scale=scale)
+    y = counts.to_numpy(dtype=float) * scale
+
+    out = {
+        "district": counts.columns,
+        "months": len(counts),
+        "initial_n": y[0],
+        "latest_n": y[-1],
+    }
+    for i, name in enumerate(FIT_PARAMS):
+        value = np.exp(log_theta[:, i])
+        out[name] = value
+        out[f"{name}_se"] = value * log_se[:, i]
+        out[f"{name}_ci_low"] = np.exp(log_theta[:, i] - 1.96 * log_se[:, i])
+        out[f"{name}_ci_high"] = np.exp(log_theta[:, i] + 1.96 * log_se[:, i])
+    out["rmse"] = np.sqrt(((N_fit - y) ** 2).mean(axis=0))
+    out_df = pd.DataFrame(out)
+
+    args.output_file.parent.mkdir(parents=True, exist_ok=True)
+    out_df.to_csv(args.output_file, index=False)
+
+    print(f"标定月份：{counts.index[0]} ~ {counts.index[-1]}（{len(counts)} 个月）")
+    print(f"投诉量换算系数：1 件/月 = {scale:.1f} 只")
+    print(f"least_squares：{fit.nfev} 次函数评估，状态 {fit.status}（{fit.message}）")
+    cols = ["district"] + FIT_PARAMS + [f"{name}_se" for name in FIT_PARAMS] + ["rmse"]
+    print(out_df[cols].to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    print("已写入标定结果：", args.output_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,66 +2,131 @@
 任务4.2：鼠患动力学仿真
 --------------------------------
 基于暴露时间估计及已有 rat_dynamics_model，比较
-不同策略（AM/PM、Bins）下的稳态鼠群数量。
+不同策略（AM/PM、Bins）下的稳态鼠群数量。默认使用解析平衡点；
+`--method ode` 时所有区在一次批量积分中求解。
+另由精确解直接给出全面推行 Bins 后鼠群降到目标水平所需天数，
+并输出稳态对 Gi 与 η 的精确偏导，供基于梯度的策略优化使用。
 """
 
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
 import sys
 
 import numpy as np
 import pandas as pd
-from scipy.integrate import odeint
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 sys.path.append(str(PROJECT_ROOT))
 
-from scripts.models.rat_dynamics_model import RAT_MODEL_PARAMS, rat_dynamics
+from scripts.models.rat_dynamics_model import (
+    RAT_MODEL_PARAMS,
+    cached_simulate_rat_batch,
+    rat_steady_state,
+    rat_steady_state_sensitivities,
+    time_to_threshold,
+)
+from scripts.models.task4_exposure_time import ExposureParams
 
 EXPOSURE_FILE = PROJECT_ROOT / "data" / "features" / "district_exposure_estimates.csv"
 OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task4_rat_simulation.csv"
+BINS_TARGET_REDUCTION = 0.05  # 目标：比当前稳态降低 5%
 
 
-def simulate_rat_level(initial_n: float, gi: float, days: int = 60):
-    params = RAT_MODEL_PARAMS.copy()
-    params["G"] = gi
-    t_grid = np.linspace(0, days, days * 2)
-    sol = odeint(
-        rat_dynamics,
-        initial_n,
-        t_grid,
-        args=(
-            params["alpha"],
-            params["K_base"],
-            params["eta"],
-            params["G"],
-            params["delta"],
-            params["H"],
-        ),
+def simulate_rat_levels(initial_n, gi, days: int = 60) -> np.ndarray:
+    """
+    对一组 Gi（可为任意形状数组）批量积分，返回第 days 天的鼠群量；
+    相同的 (初始量, Gi, 天数) 输入直接取自默认缓存。
+    """
+    _, steady, _ = cached_simulate_rat_batch(
+        N0=initial_n,
+        K=RAT_MODEL_PARAMS["K_base"],
+        G=gi,
+        T_duration=days,
+        T_step=0.5,
+    )
+    return steady
+
+
+def steady_rat_levels(gi) -> np.ndarray:
+    """默认参数下 Gi 对应的解析平衡鼠群量。"""
+    return rat_steady_state(
+        RAT_MODEL_PARAMS["alpha"],
+        RAT_MODEL_PARAMS["K_base"],
+        RAT_MODEL_PARAMS["eta"],
+        gi,
+        RAT_MODEL_PARAMS["delta"],
+        RAT_MODEL_PARAMS["H"],
+    )
+
+
+def steady_rat_sensitivities(gi):
+    """默认参数下稳态对各参数的偏导，返回 {参数名: 数组}。"""
+    return rat_steady_state_sensitivities(
+        RAT_MODEL_PARAMS["alpha"],
+        RAT_MODEL_PARAMS["K_base"],
+        RAT_MODEL_PARAMS["eta"],
+        gi,
+        RAT_MODEL_PARAMS["delta"],
+        RAT_MODEL_PARAMS["H"],
+    )
+
+
+def bins_days_to_target(df: pd.DataFrame, steady, reduction: float = BINS_TARGET_REDUCTION):
+    """从当前稳态出发全面推行 Bins，鼠群降到 (1 - reduction) 倍所需天数。"""
+    params = ExposureParams()
+    adoption = df["bins_adoption"].to_numpy(dtype=float)
+    full_bins = params.bins_reduction / (1 - adoption * (1 - params.bins_reduction))
+    return time_to_threshold(
+        steady,
+        steady * (1 - reduction),
+        RAT_MODEL_PARAMS["alpha"],
+        RAT_MODEL_PARAMS["K_base"],
+        RAT_MODEL_PARAMS["eta"],
+        df["gi_tons"].to_numpy(dtype=float) * full_bins,
+        RAT_MODEL_PARAMS["delta"],
+        RAT_MODEL_PARAMS["H"],
     )
-    return float(sol[-1][0])
 
 
 def main():
+    parser = argparse.ArgumentParser(description="任务4.2：鼠患动力学仿真")
+    parser.add_argument(
+        "--method",
+        choices=["analytic", "ode"],
+        default="analytic",
+        help="analytic 直接计算平衡点；ode 积分 60 天取终值",
+    )
+    parser.add_argument(
+        "--bins-target-reduction",
+        type=float,
+        default=BINS_TARGET_REDUCTION,
+        help="推行 Bins 后的目标降幅（相对当前稳态）",
+    )
+    args = parser.parse_args()
+
     df = pd.read_csv(EXPOSURE_FILE)
-    records = []
-    for _, row in df.iterrows():
-        district = row["district"]
-        gi = row["gi_tons"]
+    gi = df["gi_tons"].to_numpy(dtype=float)
+    if args.method == "analytic":
+        steady = steady_rat_levels(gi)
+    else:
         baseline_n = 1500  # 以投诉量为代理
-        steady = simulate_rat_level(baseline_n, gi)
-        records.append(
-            {
-                "district": district,
-                "freq": row["freq"],
-                "strategy": row["strategy"],
-                "gi_tons": gi,
-                "steady_rat": steady,
-            }
-        )
-
-    out_df = pd.DataFrame(records)
+        steady = simulate_rat_levels(baseline_n, gi)
+    sensitivities = steady_rat_sensitivities(gi)
+
+    out_df = pd.DataFrame(
+        {
+            "district": df["district"],
+            "freq": df["freq"],
+            "strategy": df["strategy"],
+            "gi_tons": df["gi_tons"],
+            "steady_rat": steady,
+            "bins_days_to_target": bins_days_to_target(df, steady, args.bins_target_reduction),
+            "dsteady_dG": sensitivities["G"],
+            "dsteady_deta": sensitivities["eta"],
+        }
+    )
     OUTPUT_FILE.parent.mkdir(exist_ok=True, parents=True)
     out_df.to_csv(OUTPUT_FILE, index=False)
     print("已生成鼠患仿真结果：", OUTPUT_FILE)
@@ -0,0 +1,195 @@
+"""
+任务4.7：鼠群模型参数不确定性的集合传播
+------------------------------------------
+任务4.2 只给出一组参数下的单一稳态值。本脚本按用户指定的分布抽取数千组
+(α, K, η, δ, H)，与“区 × 策略”一起广播成 (样本, 区, 策略) 数组，
+一次向量化计算得到全部稳态（解析平衡点）与轨迹（常数 G 精确解，
+或 `--method ode` 时一次批量积分），再沿样本维取分位数带。
+
+分布写法：`--dist alpha=lognormal:0.8:0.25`，即 名称=分布:参数1:参数2，
+支持 lognormal(中位数, 对数标准差)、normal(均值, 标准差，截断为正)、
+uniform(下限, 上限)、triangular(下限, 上限，众数取中点)。
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.rat_dynamics_model import (
+    RAT_MODEL_PARAMS,
+    cached_simulate_rat_batch,
+    rat_closed_form,
+    rat_steady_state,
+)
+from scripts.models.task4_exposure_time import ExposureParams
+
+DEMAND_FILE = PROJECT_ROOT / "data" / "features" / "district_demand_reestimated.csv"
+EXPOSURE_FILE = PROJECT_ROOT / "data" / "features" / "district_exposure_estimates.csv"
+STEADY_FILE = PROJECT_ROOT / "outputs" / "task4_rat_ensemble_steady.csv"
+BANDS_FILE = PROJECT_ROOT / "outputs" / "task4_rat_ensemble_bands.csv"
+
+PARAM_NAMES = ["alpha", "K", "eta", "delta", "H"]
+DEFAULT_DISTRIBUTIONS = {
+    "alpha": ("lognormal", RAT_MODEL_PARAMS["alpha"], 0.25),
+    "K": ("lognormal", RAT_MODEL_PARAMS["K_base"], 0.3),
+    "eta": ("lognormal", RAT_MODEL_PARAMS["eta"], 0.3),
+    "delta": ("lognormal", RAT_MODEL_PARAMS["delta"], 0.25),
+    "H": ("lognormal", RAT_MODEL_PARAMS["H"], 0.5),
+}
+STRATEGIES = ["AM", "PM", "AM_BINS", "PM_BINS"]
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+NUM_SAMPLES = 2000
+INITIAL_N = 1500
+HORIZON_DAYS = 60
+
+
+def parse_distribution(spec: str) -> Tuple[str, Tuple]:
+    """解析 `名称=分布:参数1:参数2`。"""
+    name, _, rest = spec.partition("=")
+    kind, *values = rest.split(":")
+    if name not in PARAM_NAMES:
+        raise ValueError(f"未知参数 {name}，可选：{PARAM_NAMES}")
+    if kind not in {"lognormal", "normal", "uniform", "triangular"} or len(values) != 2:
+        raise ValueError(f"无法解析分布：{spec}")
+    return name, (kind, float(values[0]), float(values[1]))
+
+
+def sample_parameters(
+    distributions: Dict[str, Tuple], num_samples: int, rng: np.random.Generator
+) -> Dict[str, np.ndarray]:
+    samples = {}
+    for name in PARAM_NAMES:
+        kind, a, b = distributions[name]
+        if kind == "lognormal":
+            values = a * np.exp(b * rng.standard_normal(num_samples))
+        elif kind == "normal":
+            values = np.abs(rng.normal(a, b, num_samples))
+        elif kind == "uniform":
+            values = rng.uniform(a, b, num_samples)
+        else:
+            values = rng.triangular(a, 0.5 * (a + b), b, num_samples)
+        samples[name] = values
+    return samples
+
+
+def strategy_forcing(df: pd.DataFrame, params: ExposureParams) -> np.ndarray:
+    """各区在 STRATEGIES 下的 Gi（吨），形状 (区, 策略)；BINS 表示全面推行。"""
+    current = df["bins_adoption"].to_numpy(dtype=float)
+    adoption = np.stack([current, current, np.ones_like(current), np.ones_like(current)], axis=1)
+    window = np.array([params.am_window, params.pm_window] * 2)
+    exposure = window * (1 - adoption * (1 - params.bins_reduction))
+    weekly = df["weekly_waste_tons_est"].to_numpy(dtype=float)[:, None]
+    return weekly * (exposure / 24) / df["freq"].to_numpy(dtype=float)[:, None]
+
+
+def run_ensemble(
+    G: np.ndarray,
+    samples: Dict[str, np.ndarray],
+    days: Iterable[float],
+    N0: float = INITIAL_N,
+    method: str = "analytic",
+):
+    """
+    G 为 (区, 策略)，参数样本为 (样本,)。返回稳态 (样本, 区, 策略)、
+    轨迹 (时间, 样本, 区, 策略) 与时间数组；两种方法都在 days 上输出。
+    """
+    p = {name: samples[name][:, None, None] for name in PARAM_NAMES}
+    args = (p["alpha"], p["K"], p["eta"], G[None], p["delta"], p["H"])
+    steady = rat_steady_state(*args)
+    days = np.asarray(days, dtype=float)
+    if method == "analytic":
+        return steady, rat_closed_form(N0, days[:, None, None, None], *args), days
+    trajectory, _, t = cached_simulate_rat_batch(
+        N0,
+        p["K"],
+        G[None],
+        days[-1],
+        days[1] - days[0],
+        alpha=p["alpha"],
+        eta=p["eta"],
+        delta=p["delta"],
+        H=p["H"],
+        t_eval=days,
+    )
+    return steady, trajectory, t
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务4.7：鼠群模型集合不确定性传播")
+    parser.add_argument("--samples", type=int, default=NUM_SAMPLES)
+    parser.add_argument("--days", type=int, default=HORIZON_DAYS)
+    parser.add_argument("--method", choices=["analytic", "ode"], default="analytic")
+    parser.add_argument(
+        "--dist",
+        action="append",
+        default=[],
+        metavar="NAME=KIND:A:B",
+        help="覆盖某参数的抽样分布，可重复",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--steady-file", type=Path, default=STEADY_FILE)
+    parser.add_argument("--bands-file", type=Path, default=BANDS_FILE)
+    args = parser.parse_args()
+
+    distributions = dict(DEFAULT_DISTRIBUTIONS)
+    distributions.update(parse_distribution(spec) for spec in args.dist)
+
+    demand = pd.read_csv(DEMAND_FILE)[["district", "weekly_waste_tons_est"]]
+    df = pd.read_csv(EXPOSURE_FILE).merge(demand, on="district").sort_values("district")
+    G = strategy_forcing(df, ExposureParams())
+
+    rng = np.random.default_rng(args.seed)
+    samples = sample_parameters(distributions, args.samples, rng)
+    days = np.arange(args.days + 1, dtype=float)
+    steady, trajectory, days = run_ensemble(G, samples, days, method=args.method)
+
+    districts = df["district"].to_numpy()
+    labels = [f"q{int(q * 100):02d}" for q in QUANTILES]
+    steady_q = np.quantile(steady, QUANTILES, axis=0)  # (q, 区, 策略)
+    idx_d, idx_s = np.meshgrid(
+        np.arange(len(districts)), np.arange(len(STRATEGIES)), indexing="ij"
+    )
+    steady_df = pd.DataFrame(
+        {
+            "district": districts[idx_d.ravel()],
+            "strategy": np.array(STRATEGIES)[idx_s.ravel()],
+            "gi_tons": G.ravel(),
+            "mean": steady.mean(axis=0).ravel(),
+            **{label: steady_q[i].ravel() for i, label in enumerate(labels)},
+        }
+    )
+
+    bands_q = np.quantile(trajectory, QUANTILES, axis=1)  # (q, 时间, 区, 策略)
+    grid = np.meshgrid(
+        days, np.arange(len(districts)), np.arange(len(STRATEGIES)), indexing="ij"
+    )
+    bands_df = pd.DataFrame(
+        {
+            "day": grid[0].ravel(),
+            "district": districts[grid[1].ravel()],
+            "strategy": np.array(STRATEGIES)[grid[2].ravel()],
+            **{label: bands_q[i].ravel() for i, label in enumerate(labels)},
+        }
+    )
+
+    for path, table in ((args.steady_file, steady_df), (args.bands_file, bands_df)):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table.to_csv(path, index=False)
+
+    print(f"{args.samples} 组参数 × {len(districts)} 区 × {len(STRATEGIES)} 策略（{args.method}）")
+    print(steady_df.to_string(index=False, float_format=lambda v: f"{v:.0f}"))
+    print("已写入集合稳态分位数：", args.steady_file)
+    print("已写入集合轨迹分位数带：", args.bands_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+任务4.8：车队约束下的 AM/PM + Bins 联合策略优化
+--------------------------------------------------
+任务4.3 仅按稳态鼠群是否高于中位数给出两种文字建议。本脚本在任务4.1 的
+策略网格（频率 × AM/PM × Bins 覆盖率）上为每个区选择一个方案，使全市
+稳态鼠群总量最小，同时满足：
+- 全市每周卡车日预算（频率 × 对应频率所需卡车数）；
+- AM 班次容量（AM 方案占用的卡车日）；
+- Bins 数量预算（覆盖率 × 全区住户数，见 `bins_needed`）。
+
+这是多选背包问题。对资源约束做拉格朗日松弛后，各区独立取最优方案
+（(区, 方案) 数组上的一次 argmin），次梯度法更新乘子；再以贪心修复可行性、
+单区替换做局部改进，并给出对偶下界与间隙。`--exact` 时另用 MILP 求最优解对照。
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.rat_dynamics_model import RAT_MODEL_PARAMS, rat_steady_state
+from scripts.models.task1_frequency_optimizer import _truck_col
+from scripts.models.task5_npv_analysis import BINS_HOUSEHOLD_COLUMN, NUM_BINS, bins_needed
+
+DEMAND_FILE = PROJECT_ROOT / "data" / "features" / "district_demand_reestimated.csv"
+GRID_FILE = PROJECT_ROOT / "data" / "features" / "district_exposure_grid.csv"
+EXPOSURE_FILE = PROJECT_ROOT / "data" / "features" / "district_exposure_estimates.csv"
+OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task4_strategy_optimization.csv"
+
+RESOURCES = ["truck_days", "am_truck_days", "bins"]
+OPTION_KEYS = ["freq", "strategy", "bins_adoption"]
+SUBGRADIENT_ITERATIONS = 200
+
+
+@dataclass
+class StrategyOptions:
+    districts: np.ndarray  # (区,)
+    options: pd.DataFrame  # 按 (区, 方案) 主序排列的网格
+    cost: np.ndarray  # (区, 方案) 稳态鼠群量
+    usage: np.ndarray  # (区, 方案, 资源)
+
+
+def build_options(
+    grid: pd.DataFrame, demand: pd.DataFrame, steady_source: str = "analytic"
+) -> StrategyOptions:
+    grid = grid.sort_values(["district"] + OPTION_KEYS).reset_index(drop=True)
+    districts = grid["district"].unique()
+    n_options = len(grid) // len(districts)
+
+    demand = demand.set_index("district").loc[grid["district"]]
+    trucks = np.select(
+        [grid["freq"] == f for f in (2, 3)],
+        [demand[_truck_col(f)].to_numpy(dtype=float) for f in (2, 3)],
+    )
+    truck_days = grid["freq"].to_numpy(dtype=float) * trucks
+    usage = np.stack(
+        [
+            truck_days,
+            np.where(grid["strategy"] == "AM", truck_days, 0.0),
+            bins_needed(
+                demand[BINS_HOUSEHOLD_COLUMN].to_numpy(dtype=float),
+                grid["bins_adoption"].to_numpy(dtype=float),
+            ),
+        ],
+        axis=-1,
+    )
+
+    gi = grid["gi_tons"].to_numpy(dtype=float)
+    if steady_source == "lookup":
+        from scripts.models.rat_lookup_table import RatLookupTable
+
+        cost, _ = RatLookupTable.load().query(gi, RAT_MODEL_PARAMS["K_base"])
+    else:
+        cost = rat_steady_state(
+            RAT_MODEL_PARAMS["alpha"],
+            RAT_MODEL_PARAMS["K_base"],
+            RAT_MODEL_PARAMS["eta"],
+            gi,
+            RAT_MODEL_PARAMS["delta"],
+            RAT_MODEL_PARAMS["H"],
+        )
+
+    shape = (len(districts), n_options)
+    return StrategyOptions(
+        districts=districts,
+        options=grid,
+        cost=np.asarray(cost, dtype=float).reshape(shape),
+        usage=usage.reshape(shape + (len(RESOURCES),)),
+    )
+
+
+def _budget_scale(budget: np.ndarray) -> np.ndarray:
+    """归一化用的预算尺度；预算为 0 的资源按绝对用量计。"""
+    return np.where(budget > 0, budget, 1.0)
+
+
+def _totals(usage: np.ndarray, choice: np.ndarray) -> np.ndarray:
+    return usage[np.arange(len(choice)), choice].sum(axis=0)
+
+
+def _repair(cost, usage, budget, choice):
+    """贪心修复：每步选取“超额减少量 / 目标增加量”最大的单区替换。"""
+    rows = np.arange(len(choice))
+    norm = _budget_scale(budget)
+    while True:
+        excess = np.maximum(_totals(usage, choice) - budget, 0) / norm
+        if not excess.any():
+            return choice
+        delta_usage = (usage - usage[rows, choice][:, None]) / norm
+        new_excess = np.maximum(excess + delta_usage, 0).sum(axis=-1)
+        gain = excess.sum() - new_excess
+        delta_cost = cost - cost[rows, choice][:, None]
+        score = np.where(gain > 1e-12, gain / np.maximum(delta_cost, 1e-9), -np.inf)
+        d, o = np.unravel_index(np.argmax(score), score.shape)
+        if not np.isfinite(score[d, o]):
+            raise ValueError("预算过紧，无法找到可行方案")
+        choice[d] = o
+
+
+def _improve(cost, usage, budget, choice):
+    """局部改进：反复执行使目标下降最多、且保持可行的单区替换。"""
+    rows = np.arange(len(choice))
+    while True:
+        slack = budget - _totals(usage, choice)
+        delta_usage = usage - usage[rows, choice][:, None]
+        feasible = (delta_usage <= slack + 1e-9).all(axis=-1)
+        delta_cost = np.where(feasible, cost - cost[rows, choice][:, None], np.inf)
+        d, o = np.unravel_index(np.argmin(delta_cost), delta_cost.shape)
+        if delta_cost[d, o] >= -1e-9:
+            return choice
+        choice[d] = o
+
+
+def solve_lagrangian(
+    cost: np.ndarray,
+    usage: np.ndarray,
+    budget: np.ndarray,
+    iterations: int = SUBGRADIENT_ITERATIONS,
+) -> Dict:
+    """拉格朗日松弛 + 次梯度法；返回可行解、目标值与对偶下界。"""
+    budget = np.asarray(budget, dtype=float)
+    if (budget < 0).any():
+        raise ValueError("资源预算不能为负")
+    norm = _budget_scale(budget)
+    scaled = usage / norm  # 各资源按预算归一化，预算变为 1（零预算资源仍为 0）
+    scale = np.abs(cost).mean() / scaled.sum(axis=(0, 1)).clip(min=1e-12) * len(cost)
+    lam = np.zeros(len(budget))
+    best_bound = -np.inf
+    best_lam = lam
+    for k in range(iterations):
+        reduced = cost + scaled @ lam
+        choice = reduced.argmin(axis=1)
+        bound = reduced.min(axis=1).sum() - lam @ (budget / norm)
+        if bound > best_bound:
+            best_bound, best_lam = bound, lam
+        subgrad = scaled[np.arange(len(choice)), choice].sum(axis=0) - budget / norm
+        lam = np.maximum(lam + scale * subgrad / np.sqrt(k + 1), 0)
+
+    choice = (cost + scaled @ best_lam).argmin(axis=1)
+    choice = _repair(cost, usage, budget, choice)
+    choice = _improve(cost, usage, budget, choice)
+    objective = cost[np.arange(len(choice)), choice].sum()
+    return {
+        "choice": choice,
+        "objective": objective,
+        "lower_bound": best_bound,
+        "multipliers": best_lam / norm,
+        "usage": _totals(usage, choice),
+    }
+
+
+def solve_exact(cost: np.ndarray, usage: np.ndarray, budget: np.ndarray) -> Optional[np.ndarray]:
+    """MILP：每区恰选一个方案、资源不超预算。"""
+    from scipy.optimize import Bounds, LinearConstraint, milp
+
+    n_districts, n_options = cost.shape
+    pick_one = np.kron(np.eye(n_districts), np.ones(n_options))
+    resources = usage.reshape(-1, usage.shape[-1]).T
+    result = milp(
+        cost.ravel(),
+        integrality=np.ones(cost.size),
+        bounds=Bounds(0, 1),
+        constraints=[
+            LinearConstraint(pick_one, 1, 1),
+            LinearConstraint(resources, -np.inf, budget),
+        ],
+    )
+    if not result.success:
+        return None
+    return result.x.reshape(cost.shape).argmax(axis=1)
+
+
+def current_usage(options: StrategyOptions, current: pd.DataFrame):
+    """现行策略在网格中的方案下标、资源占用与目标值。"""
+    keyed = options.options.reset_index().merge(
+        current[["district"] + OPTION_KEYS], on=["district"] + OPTION_KEYS
+    )
+    n_options = options.cost.shape[1]
+    order = keyed.set_index("district").loc[options.districts, "index"].to_numpy()
+    choice = order % n_options
+    return choice, _totals(options.usage, choice), options.cost[np.arange(len(choice)), choice].sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务4.8：车队约束下的联合策略优化")
+    parser.add_argument("--truck-budget", type=float, default=None, help="默认取现行策略的卡车日")
+    parser.add_argument("--am-capacity", type=float, default=None, help="默认取现行策略的 AM 卡车日")
+    parser.add_argument("--bins-budget", type=float, default=NUM_BINS)
+    parser.add_argument("--steady-source", choices=["analytic", "lookup"], default="analytic")
+    parser.add_argument("--exact", action="store_true", help="同时用 MILP 求精确最优解对照")
+    parser.add_argument("--output-file", type=Path, default=OUTPUT_FILE)
+    args = parser.parse_args()
+    for name in ("truck_budget", "am_capacity", "bins_budget"):
+        value = getattr(args, name)
+        if value is not None and value < 0:
+            parser.error(f"--{name.replace('_', '-')} 不能为负")
+
+    grid = pd.read_csv(GRID_FILE)
+    demand = pd.read_csv(DEMAND_FILE)
+    current = pd.read_csv(EXPOSURE_FILE)
+
+    options = build_options(grid, demand, args.steady_source)
+    current_choice, current_use, current_objective = current_usage(options, current)
+    budget = np.array(
+        [
+            current_use[0] if args.truck_budget is None else args.truck_budget,
+            current_use[1] if args.am_capacity is None else args.am_capacity,
+            args.bins_budget,
+        ]
+    )
+
+    start = time.perf_counter()
+    try:
+        result = solve_lagrangian(options.cost, options.usage, budget)
+    except ValueError as exc:
+        parser.error(f"{exc}（预算：{dict(zip(RESOURCES, budget.tolist()))}）")
+    elapsed = time.perf_counter() - start
+
+    rows = np.arange(len(options.districts))
+    n_options = options.cost.shape[1]
+    chosen = options.options.iloc[rows * n_options + result["choice"]].reset_index(drop=True)
+    before = options.options.iloc[rows * n_options + current_choice].reset_index(drop=True)
+    out_df = pd.DataFrame(
+        {
+            "district": options.districts,
+            "current_freq": before["freq"],
+            "current_strategy": before["strategy"],
+            "current_bins_adoption": before["bins_adoption"],
+            "current_steady_rat": options.cost[rows, current_choice],
+            "freq": chosen["freq"],
+            "strategy": chosen["strategy"],
+            "bins_adoption": chosen["bins_adoption"],
+            "gi_tons": chosen["gi_tons"],
+            "steady_rat": options.cost[rows, result["choice"]],
+        }
+    )
+    for i, name in enumerate(RESOURCES):
+        out_df[name] = options.usage[rows, result["choice"], i]
+    args.output_file.parent.mkdir(parents=True, exist_ok=True)
+    out_df.to_csv(args.output_file, index=False)
+
+    gap = (result["objective"] - result["lower_bound"]) / result["objective"]
+    print(f"{len(options.districts)} 个区 × {n_options} 个方案，拉格朗日求解耗时 {elapsed * 1e3:.1f} ms")
+    print(f"稳态鼠群总量：现行 {current_objective:.0f} → 优化 {result['objective']:.0f}")
+    print(f"对偶下界 {result['lower_bound']:.0f}，相对间隙 {gap:.2%}")
+    for name, used, cap in zip(RESOURCES, result["usage"], budget):
+        print(f"  {name}: {used:.0f} / {cap:.0f}")
+    if args.exact:
+        start = time.perf_counter()
+        exact = solve_exact(options.cost, options.usage, budget)
+        exact_elapsed = time.perf_counter() - start
+        if exact is None:
+            print("MILP 未找到可行解")
+        else:
+            exact_objective = options.cost[rows, exact].sum()
+            print(f"MILP 最优 {exact_objective:.0f}（耗时 {exact_elapsed * 1e3:.1f} ms）")
+    print(out_df.to_string(index=False))
+    print("已写入策略优化结果：", args.output_file)
+
+
+if __name__ == "__main__":
+    main()
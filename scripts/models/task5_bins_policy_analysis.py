@@ -2,42 +2,130 @@
 任务5.1：Bins 政策影响评估
 --------------------------------
 估算强制推广 Bins 对车队需求和鼠患稳态的影响。
+
+对每个区在 0~100% 的 Bins 覆盖率曲线上重新计算有效暴露、Gi 与稳态鼠群
+（(区, 覆盖率) 数组一次求解，默认解析平衡点，`--method ode` 时批量积分），
+输出完整的覆盖率-响应曲线；政策效果取现行覆盖率与政策覆盖率两点的模型值，
+供 NPV 与政策总结使用，不再假设固定的鼠群降幅。
+
+`trucks_needed_2x_est` 视为现行覆盖率下的需求，曲线与政策效果均按有效暴露
+相对现行覆盖率的比例缩放；`bins_added` 为从现行覆盖率提高到政策覆盖率
+需新增的 Bins 数，任务5.2 据此计算资本支出。
 """
 
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
+import sys
 
+import numpy as np
 import pandas as pd
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.task4_exposure_time import ExposureParams, effective_exposure, gi_tons
+from scripts.models.task4_rat_dynamics_analysis import simulate_rat_levels, steady_rat_levels
+from scripts.models.task5_npv_analysis import BINS_HOUSEHOLD_COLUMN, bins_needed
+
 DEMAND_FILE = PROJECT_ROOT / "data" / "features" / "district_demand_reestimated.csv"
-RAT_FILE = PROJECT_ROOT / "outputs" / "task4_rat_simulation.csv"
+EXPOSURE_FILE = PROJECT_ROOT / "data" / "features" / "district_exposure_estimates.csv"
 OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task5_bins_policy_effects.csv"
+CURVE_FILE = PROJECT_ROOT / "outputs" / "task5_bins_adoption_response.csv"
 
+POLICY_ADOPTION_SHARE = 0.8  # 强制政策下 1-9 户建筑中采用 Bins 的比例
+CURVE_LEVELS = np.linspace(0.0, 1.0, 21)
+BASELINE_N = 1500  # ode 模式的初始鼠群量，与任务4.2 一致
 
-def main():
+
+def adoption_response(
+    df: pd.DataFrame, adoption: np.ndarray, params: ExposureParams, method: str = "analytic"
+):
+    """
+    adoption 为 (区, 覆盖率点) 数组，返回同形状的有效暴露、Gi、稳态鼠群与
+    2 次/周所需卡车数（按有效暴露相对现行覆盖率的比例缩放）。
+    """
+    window = np.where(df["strategy"] == "AM", params.am_window, params.pm_window)[:, None]
+    exposure = effective_exposure(window, adoption, params)
+    current = df["bins_adoption"].to_numpy(dtype=float)[:, None]
+    exposure_now = effective_exposure(window, current, params)
+    gi = gi_tons(
+        df["weekly_waste_tons_est"].to_numpy(dtype=float)[:, None],
+        exposure,
+        df["freq"].to_numpy(dtype=float)[:, None],
+    )
+    steady = steady_rat_levels(gi) if method == "analytic" else simulate_rat_levels(BASELINE_N, gi)
+    trucks = df["trucks_needed_2x_est"].to_numpy(dtype=float)[:, None] * exposure / exposure_now
+    return exposure, gi, steady, trucks
+
+
+def load_policy_inputs() -> pd.DataFrame:
+    """需求重估表并入现行频率、AM/PM 与 Bins 覆盖率。"""
     demand_df = pd.read_csv(DEMAND_FILE)
-    rat_df = pd.read_csv(RAT_FILE)
+    exposure_df = pd.read_csv(EXPOSURE_FILE)[["district", "freq", "strategy", "bins_adoption"]]
+    return demand_df.merge(exposure_df, on="district", how="left")
 
-    demand_df["bins_adoption"] = demand_df["buildings_1to9_units_ratio"] * 0.8
-    baseline_exposure = 12
-    demand_df["effective_exposure"] = baseline_exposure * (1 - demand_df["bins_adoption"] * 0.6)
-    demand_df["trucks_after_bins"] = (
-        demand_df["effective_exposure"] / baseline_exposure
-    ) * demand_df["trucks_needed_2x_est"]
 
-    merged = demand_df.merge(rat_df[["district", "steady_rat"]], on="district", how="left")
-    merged["steady_rat_after_bins"] = merged["steady_rat"] * 0.6
+def policy_adoption(df: pd.DataFrame, share: float = POLICY_ADOPTION_SHARE) -> np.ndarray:
+    """强制 1-9 户建筑采用 Bins 后的覆盖率，不低于现行覆盖率。"""
+    lowrise = df["buildings_1to9_units_ratio"].to_numpy(dtype=float)
+    return np.maximum(df["bins_adoption"].to_numpy(dtype=float), lowrise * share)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务5.1：Bins 政策影响评估")
+    parser.add_argument("--method", choices=["analytic", "ode"], default="analytic")
+    args = parser.parse_args()
+
+    df = load_policy_inputs()
+    params = ExposureParams()
+
+    # 覆盖率-响应曲线
+    levels = np.broadcast_to(CURVE_LEVELS, (len(df), len(CURVE_LEVELS)))
+    exposure, gi, steady, trucks = adoption_response(df, levels, params, args.method)
+    curve_df = pd.DataFrame(
+        {
+            "district": np.repeat(df["district"].to_numpy(), len(CURVE_LEVELS)),
+            "bins_adoption": levels.ravel(),
+            "effective_exposure": exposure.ravel(),
+            "gi_tons": gi.ravel(),
+            "steady_rat": steady.ravel(),
+            "trucks_needed_2x": trucks.ravel(),
+        }
+    )
+
+    # 政策效果：现行覆盖率 → 政策覆盖率
+    current = df["bins_adoption"].to_numpy(dtype=float)
+    policy = policy_adoption(df)
+    _, _, steady_pair, trucks_pair = adoption_response(
+        df, np.stack([current, policy], axis=1), params, args.method
+    )
+    df["bins_adoption_current"] = current
+    df["bins_adoption_policy"] = policy
+    households = df[BINS_HOUSEHOLD_COLUMN].to_numpy(dtype=float)
+    df["bins_added"] = bins_needed(households, policy, current)
+    df["trucks_after_bins"] = trucks_pair[:, 1]
+    df["steady_rat"] = steady_pair[:, 0]
+    df["steady_rat_after_bins"] = steady_pair[:, 1]
 
     OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    merged[
-        ["district", "trucks_needed_2x_est", "trucks_after_bins", "steady_rat", "steady_rat_after_bins"]
+    df[
+        [
+            "district",
+            "bins_adoption_current",
+            "bins_adoption_policy",
+            "bins_added",
+            "trucks_needed_2x_est",
+            "trucks_after_bins",
+            "steady_rat",
+            "steady_rat_after_bins",
+        ]
     ].to_csv(OUTPUT_FILE, index=False)
+    curve_df.to_csv(CURVE_FILE, index=False)
     print("已生成 Bins 政策影响数据：", OUTPUT_FILE)
+    print("已生成 Bins 覆盖率-响应曲线：", CURVE_FILE)
 
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,257 @@
+"""
+任务5.3：分年度 Bins 推广计划（动态规划）
+--------------------------------------------
+任务5.2 假设 `NUM_BINS` 个容器在第 0 年一次性购置、此后每年节省不变。
+本脚本在年度资本预算约束下，逐区逐年决定新增的 Bins 覆盖率以最大化 NPV：
+
+- 覆盖率离散为 0, 0.1, …, 1.0，只增不减；新增覆盖的购置成本为
+  `bins_capex`（`CAPEX_PER_BIN` × 新增覆盖户数），在年初支付；
+- 卡车节省与鼠患收益随当年覆盖率变化：卡车需求按有效暴露相对现行覆盖率的比例缩放，
+  鼠群减少量由 `rat_steady_state` 在对应 Gi 下求得；
+- 年度预算耦合各区。对预算施加逐年拉格朗日乘子后，各区的动态规划相互独立，
+  在 (区, 覆盖率, 覆盖率) 数组上逐年向量化回溯；次梯度法更新乘子，
+  最后按年向前贪心分配预算（以 DP 价值函数为后续价值）得到可行计划，
+  并以对偶值给出 NPV 上界。
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.rat_dynamics_model import RAT_MODEL_PARAMS, rat_steady_state
+from scripts.models.task4_exposure_time import ExposureParams, effective_exposure, gi_tons
+from scripts.models.task5_npv_analysis import (
+    ANNUAL_TRUCK_COST,
+    CAPEX_PER_BIN,
+    NUM_BINS,
+    PUBLIC_HEALTH_VALUE_PER_UNIT,
+    YEARS,
+    BINS_HOUSEHOLD_COLUMN,
+    bins_capex,
+    bins_needed,
+)
+
+DEMAND_FILE = PROJECT_ROOT / "data" / "features" / "district_demand_reestimated.csv"
+EXPOSURE_FILE = PROJECT_ROOT / "data" / "features" / "district_exposure_estimates.csv"
+OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task5_bins_rollout_plan.csv"
+
+ADOPTION_LEVELS = np.round(np.linspace(0.0, 1.0, 11), 2)
+DISCOUNT_RATE = 0.07
+EFFICIENCY_GAIN = 0.4
+SUBGRADIENT_ITERATIONS = 100
+
+
+@dataclass
+class RolloutProblem:
+    districts: np.ndarray  # (区,)
+    households: np.ndarray  # (区,) 全区住户数，即全面覆盖所需 Bins 数
+    benefit: np.ndarray  # (区, 覆盖率) 相对当前覆盖率的年收益
+    start_level: np.ndarray  # (区,) 当前覆盖率在网格上的下标
+
+
+def build_problem(
+    demand: pd.DataFrame,
+    exposure: pd.DataFrame,
+    params: ExposureParams,
+    efficiency_gain: float = EFFICIENCY_GAIN,
+    levels: np.ndarray = ADOPTION_LEVELS,
+) -> RolloutProblem:
+    df = demand.merge(exposure[["district", "freq", "strategy", "bins_adoption"]], on="district")
+    df = df.sort_values("district").reset_index(drop=True)
+    window = np.where(df["strategy"] == "AM", params.am_window, params.pm_window)[:, None]
+
+    exposure_hours = effective_exposure(window, levels[None, :], params)  # (区, 覆盖率)
+    gi = gi_tons(
+        df["weekly_waste_tons_est"].to_numpy(dtype=float)[:, None],
+        exposure_hours,
+        df["freq"].to_numpy(dtype=float)[:, None],
+    )
+    rats = rat_steady_state(
+        RAT_MODEL_PARAMS["alpha"],
+        RAT_MODEL_PARAMS["K_base"],
+        RAT_MODEL_PARAMS["eta"],
+        gi,
+        RAT_MODEL_PARAMS["delta"],
+        RAT_MODEL_PARAMS["H"],
+    )
+    # trucks_needed_2x_est 为现行覆盖率下的需求，与任务5.1 口径一致
+    exposure_now = effective_exposure(window, df["bins_adoption"].to_numpy(dtype=float)[:, None], params)
+    trucks = df["trucks_needed_2x_est"].to_numpy(dtype=float)[:, None] * exposure_hours / exposure_now
+
+    start = np.searchsorted(levels, df["bins_adoption"].to_numpy(dtype=float) + 1e-9) - 1
+    rows = np.arange(len(df))
+    truck_saving = trucks[rows, start][:, None] - trucks
+    rat_reduction = rats[rows, start][:, None] - rats
+    benefit = (
+        truck_saving * efficiency_gain * ANNUAL_TRUCK_COST
+        + rat_reduction * PUBLIC_HEALTH_VALUE_PER_UNIT
+    )
+    return RolloutProblem(
+        districts=df["district"].to_numpy(),
+        households=df[BINS_HOUSEHOLD_COLUMN].to_numpy(dtype=float),
+        benefit=benefit,
+        start_level=start,
+    )
+
+
+def _discount(years: int, rate: float):
+    capex = (1 + rate) ** -np.arange(years)  # 年初支付
+    cash = (1 + rate) ** -np.arange(1, years + 1)  # 年末收益
+    return capex, cash
+
+
+def _step_values(problem: RolloutProblem, levels: np.ndarray, t: int, price, capex_disc, cash_disc):
+    """第 t 年从覆盖率 i 调整到 j 的即期价值，形状 (区, i, j)，不可减少处为 -inf。"""
+    before, after = levels[None, :, None], levels[None, None, :]
+    cost = bins_capex(problem.households[:, None, None], after, before)
+    value = problem.benefit[:, None, :] * cash_disc[t] - cost * capex_disc[t] * (1 + price)
+    return np.where(after >= before, value, -np.inf)
+
+
+def solve_dp(problem, levels, prices, capex_disc, cash_disc):
+    """给定逐年预算价格，各区独立回溯；返回价值函数 V (年 + 1, 区, 覆盖率) 与策略。"""
+    years = len(prices)
+    n_districts, n_levels = problem.benefit.shape
+    V = np.zeros((years + 1, n_districts, n_levels))
+    policy = np.zeros((years, n_districts, n_levels), dtype=int)
+    for t in range(years - 1, -1, -1):
+        q = _step_values(problem, levels, t, prices[t], capex_disc, cash_disc) + V[t + 1][:, None, :]
+        policy[t] = q.argmax(axis=-1)
+        V[t] = q.max(axis=-1)
+    return V, policy
+
+
+def _spend(problem, levels, path):
+    """各年资本支出（未折现），path 为 (年 + 1, 区) 覆盖率下标。"""
+    return bins_capex(problem.households, levels[path[1:]], levels[path[:-1]]).sum(axis=1)
+
+
+def _greedy_year(problem, levels, current, t, budget, V_next, capex_disc, cash_disc):
+    """在第 t 年预算内逐级增加覆盖率，每步取“价值增量 / 支出”最大的区。"""
+    rows = np.arange(len(current))
+    q = _step_values(problem, levels, t, 0.0, capex_disc, cash_disc)[rows, current] + V_next
+    chosen = current.copy()
+    remaining = budget
+    step_cost = bins_capex(problem.households, levels[1], levels[0])
+    while True:
+        nxt = np.minimum(chosen + 1, len(levels) - 1)
+        gain = q[rows, nxt] - q[rows, chosen]
+        ok = (nxt > chosen) & (step_cost <= remaining + 1e-6) & (gain > 0)
+        if not ok.any():
+            return chosen
+        d = np.argmax(np.where(ok, gain / step_cost, -np.inf))
+        chosen[d] = nxt[d]
+        remaining -= step_cost[d]
+
+
+def plan_rollout(
+    problem: RolloutProblem,
+    annual_budget: float,
+    years: int = YEARS,
+    discount_rate: float = DISCOUNT_RATE,
+    levels: np.ndarray = ADOPTION_LEVELS,
+    iterations: int = SUBGRADIENT_ITERATIONS,
+):
+    if annual_budget < 0:
+        raise ValueError("年度预算不能为负")
+    capex_disc, cash_disc = _discount(years, discount_rate)
+    budget = np.full(years, float(annual_budget))
+    norm = np.where(budget > 0, budget, 1.0)  # 零预算时按绝对支出计超额
+    prices = np.zeros(years)
+    best_bound, best_prices = np.inf, prices
+    rows = np.arange(len(problem.districts))
+    step0 = 1.0
+
+    for k in range(iterations):
+        V, policy = solve_dp(problem, levels, prices, capex_disc, cash_disc)
+        bound = V[0][rows, problem.start_level].sum() + (prices * budget * capex_disc).sum()
+        if bound < best_bound:
+            best_bound, best_prices = bound, prices.copy()
+        path = [problem.start_level]
+        for t in range(years):
+            path.append(policy[t][rows, path[-1]])
+        excess = (_spend(problem, levels, np.array(path)) - budget) / norm
+        prices = np.maximum(prices + step0 / np.sqrt(k + 1) * excess, 0)
+
+    # 按年向前贪心，保证每年支出不超预算
+    V, _ = solve_dp(problem, levels, best_prices, capex_disc, cash_disc)
+    path = [problem.start_level]
+    for t in range(years):
+        path.append(
+            _greedy_year(problem, levels, path[-1], t, budget[t], V[t + 1], capex_disc, cash_disc)
+        )
+    path = np.array(path)
+
+    spend = _spend(problem, levels, path)
+    npv = (problem.benefit[rows, path[1:]] * cash_disc[:, None]).sum() - (spend * capex_disc).sum()
+    return {"path": path, "spend": spend, "npv": npv, "upper_bound": best_bound, "prices": best_prices}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务5.3：分年度 Bins 推广计划")
+    parser.add_argument(
+        "--annual-budget",
+        type=float,
+        default=CAPEX_PER_BIN * NUM_BINS / YEARS,
+        help="每年资本预算（美元），默认把一次性购置总额平摊到各年",
+    )
+    parser.add_argument("--discount-rate", type=float, default=DISCOUNT_RATE)
+    parser.add_argument("--efficiency-gain", type=float, default=EFFICIENCY_GAIN)
+    parser.add_argument("--years", type=int, default=YEARS)
+    parser.add_argument("--output-file", type=Path, default=OUTPUT_FILE)
+    args = parser.parse_args()
+    if args.annual_budget < 0:
+        parser.error("--annual-budget 不能为负")
+
+    problem = build_problem(
+        pd.read_csv(DEMAND_FILE), pd.read_csv(EXPOSURE_FILE), ExposureParams(), args.efficiency_gain
+    )
+
+    start = time.perf_counter()
+    result = plan_rollout(problem, args.annual_budget, args.years, args.discount_rate)
+    elapsed = time.perf_counter() - start
+
+    path = result["path"]
+    levels = ADOPTION_LEVELS
+    records = []
+    for t in range(args.years):
+        for d, district in enumerate(problem.districts):
+            before, after = levels[path[t, d]], levels[path[t + 1, d]]
+            records.append(
+                {
+                    "year": t + 1,
+                    "district": district,
+                    "bins_adoption": after,
+                    "new_bins": bins_needed(problem.households[d], after, before),
+                    "capex": bins_capex(problem.households[d], after, before),
+                    "annual_benefit": problem.benefit[d, path[t + 1, d]],
+                }
+            )
+    out_df = pd.DataFrame(records)
+    args.output_file.parent.mkdir(parents=True, exist_ok=True)
+    out_df.to_csv(args.output_file, index=False)
+
+    print(
+        f"{len(problem.districts)} 个区 × {args.years} 年 × {len(levels)} 档覆盖率，"
+        f"求解耗时 {elapsed:.2f} s"
+    )
+    print(f"推广计划 NPV {result['npv'] / 1e6:.2f} 百万美元（对偶上界 {result['upper_bound'] / 1e6:.2f}）")
+    print("各年支出（百万美元）：", np.round(result["spend"] / 1e6, 2).tolist())
+    print(
+        out_df.pivot(index="district", columns="year", values="bins_adoption").to_string()
+    )
+    print("已写入 Bins 推广计划：", args.output_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,25 @@
 任务5.2：Bins 政策 NPV 与敏感性分析
 ------------------------------------
 基于车队节省与鼠患收益，估算10年期 NPV，并测试关键参数敏感性。
+收益取任务5.1 各区效果的全市合计，资本支出只计从现行覆盖率提高到政策
+覆盖率新增的 Bins（`bins_needed`，任务4.8、5.3、5.4 共用同一口径）。
+`bins_adoption` 是全部垃圾中经 Bins 投放的份额，因此 Bins 数按全区住户
+`BINS_HOUSEHOLD_COLUMN`（estimated_households）计。
+
+随机模式对折现率、效率提升、`CAPEX_PER_BIN`、`ANNUAL_TRUCK_COST` 与
+健康价值联合抽样（默认 200 万组），以年金系数 (1 - (1 + r)^-T) / r 的
+闭式解广播计算 NPV，分块求值控制内存，输出分布分位数与 P(NPV < 0)。
+
+`npv_surface` 在稠密的二维 / 三维参数网格上一次广播求值（默认
+折现率 × 效率提升 1000 × 1000），`break_even` 沿指定轴定位 NPV = 0 的
+盈亏平衡线；结果以紧凑的 `.npz` 数组文件保存。
 """
 
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
+from typing import Dict
 
 import numpy as np
 import pandas as pd
@@ -14,6 +28,8 @@ import pandas as pd
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 EFFECT_FILE = PROJECT_ROOT / "outputs" / "task5_bins_policy_effects.csv"
 OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task5_npv_sensitivity.csv"
+MONTE_CARLO_FILE = PROJECT_ROOT / "outputs" / "task5_npv_monte_carlo.csv"
+SURFACE_FILE = PROJECT_ROOT / "outputs" / "task5_npv_surface.npz"
 
 CAPEX_PER_BIN = 400
 NUM_BINS = 100000
@@ -21,26 +37,175 @@ ANNUAL_TRUCK_COST = 200000
 PUBLIC_HEALTH_VALUE_PER_UNIT = 500
 YEARS = 10
 
+# 敏感性表
+DISCOUNT_RATES = [0.05, 0.07, 0.1]
+EFFICIENCY_GAINS = [0.3, 0.4, 0.5]
+
+# 随机模式的抽样分布
+MC_SAMPLES = 2_000_000
+MC_CHUNK = 500_000
+DISCOUNT_RATE_RANGE = (0.03, 0.10)  # 均匀分布
+EFFICIENCY_GAIN_RANGE = (0.2, 0.6)  # 均匀分布
+CAPEX_TRIANGULAR = (300, CAPEX_PER_BIN, 550)  # (下限, 众数, 上限)
+TRUCK_COST_LOG_SD = 0.15  # 对数正态，中位数为 ANNUAL_TRUCK_COST
+HEALTH_VALUE_LOG_SD = 0.5  # 对数正态，中位数为 PUBLIC_HEALTH_VALUE_PER_UNIT
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+# 稠密网格
+SURFACE_SIZE = 1000
+
+# Bins 覆盖率对应的住户基数：覆盖率是全区住户份额，1-9 户政策的范围已体现在覆盖率中
+BINS_HOUSEHOLD_COLUMN = "estimated_households"
+
+
+def bins_needed(households, adoption, baseline=0.0):
+    """
+    覆盖率从 baseline 提高到 adoption 需新增的 Bins 数：住户数 × 覆盖率增量
+    （不为负）。覆盖率是全区住户份额，households 应取 `BINS_HOUSEHOLD_COLUMN`
+    （全区住户数）；若再取 1-9 户住户数，低层政策的建筑占比会被重复计入。
+    参数按 numpy 规则广播。
+    """
+    return np.maximum(np.asarray(adoption, dtype=float) - baseline, 0.0) * households
+
+
+def bins_capex(households, adoption, baseline=0.0, capex_per_bin=CAPEX_PER_BIN):
+    return bins_needed(households, adoption, baseline) * capex_per_bin
+
 
 def npv(cashflows, discount_rate):
     return sum(cf / ((1 + discount_rate) ** t) for t, cf in enumerate(cashflows, start=1))
 
 
+def annuity_factor(discount_rate, years=YEARS):
+    """每年末等额现金流的现值系数，r → 0 时取极限 years。"""
+    r = np.asarray(discount_rate, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = (1 - (1 + r) ** -years) / r
+    return np.where(np.abs(r) < 1e-12, float(years), factor)
+
+
+def npv_closed_form(
+    truck_saving,
+    rat_reduction,
+    discount_rate,
+    efficiency_gain,
+    capex_per_bin=CAPEX_PER_BIN,
+    annual_truck_cost=ANNUAL_TRUCK_COST,
+    health_value=PUBLIC_HEALTH_VALUE_PER_UNIT,
+    years=YEARS,
+    num_bins=NUM_BINS,
+):
+    """等额年现金流的 NPV，全部参数按 numpy 规则广播；节省量为全市合计。"""
+    annual = truck_saving * efficiency_gain * annual_truck_cost + rat_reduction * health_value
+    return annual * annuity_factor(discount_rate, years) - capex_per_bin * num_bins
+
+
+def npv_surface(
+    axes: Dict[str, np.ndarray], truck_saving: float, rat_reduction: float, **fixed
+) -> np.ndarray:
+    """
+    axes 为 {参数名: 一维取值}（参数名同 `npv_closed_form`），按给定顺序
+    构成网格的各维；其余参数取 fixed 或默认值。返回形状 (len(axis_1), ...)。
+    """
+    ndim = len(axes)
+    grid = {
+        name: np.asarray(values, dtype=float).reshape((-1,) + (1,) * (ndim - 1 - i))
+        for i, (name, values) in enumerate(axes.items())
+    }
+    return npv_closed_form(truck_saving, rat_reduction, **grid, **fixed)
+
+
+def break_even(values: np.ndarray, axis_values: np.ndarray, axis: int = -1) -> np.ndarray:
+    """
+    沿 axis 找到第一个 NPV 变号点并线性插值出 NPV = 0 的坐标（NPV 对效率、
+    成本等参数为线性，插值即精确解）；无变号处返回 nan。
+    """
+    v = np.moveaxis(values, axis, -1)
+    x = np.asarray(axis_values, dtype=float)
+    crossing = np.signbit(v[..., :-1]) != np.signbit(v[..., 1:])
+    has_root = crossing.any(axis=-1)
+    i = np.expand_dims(crossing.argmax(axis=-1), -1)
+    v0 = np.take_along_axis(v, i, -1)[..., 0]
+    v1 = np.take_along_axis(v, i + 1, -1)[..., 0]
+    x0, x1 = x[i[..., 0]], x[i[..., 0] + 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        root = x0 - v0 * (x1 - x0) / (v1 - v0)
+    return np.where(has_root, root, np.nan)
+
+
+def sample_npv(
+    num_samples: int,
+    truck_saving: float,
+    rat_reduction: float,
+    rng: np.random.Generator,
+    num_bins: float = NUM_BINS,
+) -> np.ndarray:
+    """联合抽样五个不确定参数，返回 NPV 样本。"""
+    r = rng.uniform(*DISCOUNT_RATE_RANGE, num_samples)
+    eff = rng.uniform(*EFFICIENCY_GAIN_RANGE, num_samples)
+    capex = rng.triangular(*CAPEX_TRIANGULAR, num_samples)
+    truck_cost = ANNUAL_TRUCK_COST * np.exp(TRUCK_COST_LOG_SD * rng.standard_normal(num_samples))
+    health = PUBLIC_HEALTH_VALUE_PER_UNIT * np.exp(
+        HEALTH_VALUE_LOG_SD * rng.standard_normal(num_samples)
+    )
+    return npv_closed_form(
+        truck_saving,
+        rat_reduction,
+        r,
+        eff,
+        capex_per_bin=capex,
+        annual_truck_cost=truck_cost,
+        health_value=health,
+        num_bins=num_bins,
+    )
+
+
+def monte_carlo_npv(
+    num_samples: int,
+    truck_saving: float,
+    rat_reduction: float,
+    rng: np.random.Generator,
+    chunk: int = MC_CHUNK,
+    num_bins: float = NUM_BINS,
+) -> pd.DataFrame:
+    values = np.concatenate(
+        [
+            sample_npv(
+                min(chunk, num_samples - begin), truck_saving, rat_reduction, rng, num_bins
+            )
+            for begin in range(0, num_samples, chunk)
+        ]
+    )
+    stats = {
+        "samples": num_samples,
+        "mean": values.mean(),
+        "std": values.std(),
+        "prob_negative": (values < 0).mean(),
+    }
+    stats.update({f"q{q * 100:g}": v for q, v in zip(QUANTILES, np.quantile(values, QUANTILES))})
+    return pd.DataFrame({"statistic": list(stats), "value": list(stats.values())})
+
+
 def main():
-    df = pd.read_csv(EFFECT_FILE)
-    avg_truck_saving = (df["trucks_needed_2x_est"] - df["trucks_after_bins"]).mean()
-    avg_rat_reduction = (df["steady_rat"] - df["steady_rat_after_bins"]).mean()
+    parser = argparse.ArgumentParser(description="任务5.2：Bins 政策 NPV 分析")
+    parser.add_argument("--samples", type=int, default=MC_SAMPLES, help="随机模式样本数，0 为跳过")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--surface-size", type=int, default=SURFACE_SIZE, help="稠密网格每维点数")
+    args = parser.parse_args()
 
-    discount_rates = [0.05, 0.07, 0.1]
-    efficiency_gain = [0.3, 0.4, 0.5]
+    df = pd.read_csv(EFFECT_FILE)
+    truck_saving = (df["trucks_needed_2x_est"] - df["trucks_after_bins"]).sum()
+    rat_reduction = (df["steady_rat"] - df["steady_rat_after_bins"]).sum()
+    num_bins = df["bins_added"].sum()
+    print(f"新增 Bins {num_bins:,.0f} 个，资本支出 {num_bins * CAPEX_PER_BIN / 1e6:.2f} 百万美元")
 
     records = []
-    for r in discount_rates:
-        for eff in efficiency_gain:
-            annual_saving = avg_truck_saving * eff * ANNUAL_TRUCK_COST
-            annual_health = avg_rat_reduction * PUBLIC_HEALTH_VALUE_PER_UNIT
+    for r in DISCOUNT_RATES:
+        for eff in EFFICIENCY_GAINS:
+            annual_saving = truck_saving * eff * ANNUAL_TRUCK_COST
+            annual_health = rat_reduction * PUBLIC_HEALTH_VALUE_PER_UNIT
             cashflows = [annual_saving + annual_health] * YEARS
-            npv_value = npv(cashflows, r) - CAPEX_PER_BIN * NUM_BINS
+            npv_value = npv(cashflows, r) - CAPEX_PER_BIN * num_bins
             records.append(
                 {
                     "discount_rate": r,
@@ -54,6 +219,38 @@ def main():
     out_df.to_csv(OUTPUT_FILE, index=False)
     print("已生成 NPV 敏感性分析：", OUTPUT_FILE)
 
+    if args.samples > 0:
+        rng = np.random.default_rng(args.seed)
+        summary = monte_carlo_npv(
+            args.samples, truck_saving, rat_reduction, rng, num_bins=num_bins
+        )
+        summary.to_csv(MONTE_CARLO_FILE, index=False)
+        print(summary.to_string(index=False, float_format=lambda v: f"{v:,.4g}"))
+        print("已生成 NPV 蒙特卡洛分布：", MONTE_CARLO_FILE)
+
+    if args.surface_size > 0:
+        discount = np.linspace(*DISCOUNT_RATE_RANGE, args.surface_size)
+        efficiency = np.linspace(0.0, 1.0, args.surface_size)
+        surface = npv_surface(
+            {"discount_rate": discount, "efficiency_gain": efficiency},
+            truck_saving,
+            rat_reduction,
+            num_bins=num_bins,
+        )
+        break_even_eff = break_even(surface, efficiency, axis=1)
+        np.savez_compressed(
+            SURFACE_FILE,
+            axis_names=np.array(["discount_rate", "efficiency_gain"]),
+            discount_rate=discount,
+            efficiency_gain=efficiency,
+            npv=surface.astype(np.float32),
+            break_even_efficiency=break_even_eff,
+        )
+        print(
+            f"已生成 {surface.shape[0]}×{surface.shape[1]} NPV 曲面：{SURFACE_FILE}"
+            f"（盈亏平衡效率 {np.nanmin(break_even_eff):.3f} ~ {np.nanmax(break_even_eff):.3f}）"
+        )
+
 
 if __name__ == "__main__":
     main()
@@ -17,15 +17,24 @@ def main():
     effect_df = pd.read_csv(EFFECT_FILE)
     npv_df = pd.read_csv(NPV_FILE)
 
-    avg_truck_saving = (effect_df["trucks_needed_2x_est"] - effect_df["trucks_after_bins"]).mean()
-    avg_rat_drop = (effect_df["steady_rat"] - effect_df["steady_rat_after_bins"]).mean()
+    truck_saving = effect_df["trucks_needed_2x_est"] - effect_df["trucks_after_bins"]
+    rat_drop = effect_df["steady_rat"] - effect_df["steady_rat_after_bins"]
     best_npv = npv_df["npv"].max()
+    worst_npv = npv_df["npv"].min()
+
+    if worst_npv >= 0:
+        verdict = "所有情景 NPV 均为正，表明经济上可行"
+    elif best_npv >= 0:
+        verdict = "结论依赖折现率与效率提升假设，需谨慎推进"
+    else:
+        verdict = "所有情景 NPV 均为负，按现有假设经济上不可行"
 
     summary = [
         "任务5.3 政策总结：",
-        f"- 强制 Bins 预计释放平均 {avg_truck_saving:.1f} 辆车的运力，可用于弹性调度与应急共享。",
-        f"- 鼠患稳态平均下降 {avg_rat_drop:.1f} （投诉代理），为后续 AM/PM 策略提供长期保障。",
-        f"- NPV 敏感性分析显示最优情景 NPV ≈ {best_npv/1e6:.2f} 亿美元，表明经济上可行。",
+        f"- 强制 Bins 预计共释放 {truck_saving.sum():.1f} 辆车的运力（每区平均 {truck_saving.mean():.1f} 辆），"
+        "可用于弹性调度与应急共享。",
+        f"- 鼠患稳态每区平均下降 {rat_drop.mean():.1f} （投诉代理），为后续 AM/PM 策略提供长期保障。",
+        f"- NPV 敏感性分析范围 {worst_npv / 1e6:.2f} ~ {best_npv / 1e6:.2f} 百万美元，{verdict}。",
         "- 建议把释放的车辆优先投入任务3的弹性运力池，余量用于高贫困区的动态优先调度。",
     ]
 
@@ -0,0 +1,196 @@
+"""
+任务5.4：Bins 政策方案批量比较
+--------------------------------
+任务5.1-5.3 每次只评估一种政策，比较不同方案需修改常量并依次重跑三个脚本。
+本脚本在一个进程内评估多个方案：数据只读取一次，所有方案的覆盖率与现行
+覆盖率拼成 (区, 覆盖率列) 数组、去重后一次求出稳态鼠群与卡车需求，
+再按方案汇总全市车队节省、鼠患下降、新增 Bins 数量（`bins_needed`，与任务5.2
+同一口径）与 NPV 敏感性区间，输出一张对照表。
+
+覆盖率是全区住户份额，两种范围的 Bins 数均为全区住户数 × 覆盖率增量：
+lowrise 的建筑占比只在覆盖率中计一次，all 同时覆盖大楼住户。
+
+方案写法：`--variant 名称=范围:采用比例[:区列表]`
+- 范围 lowrise：覆盖率 = 1-9 户建筑占比 × 采用比例（任务5.1 的现行政策）；
+  范围 all：所有建筑强制，覆盖率 = 采用比例；
+- 区列表用 `+` 连接（如 `MN03+MN10`），或 `topN` 表示现行稳态鼠群最高的 N 个区；
+  省略时全区推行。覆盖率均不低于现行值。
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.task4_exposure_time import ExposureParams
+from scripts.models.task5_bins_policy_analysis import (
+    POLICY_ADOPTION_SHARE,
+    adoption_response,
+    load_policy_inputs,
+    policy_adoption,
+)
+from scripts.models.task5_npv_analysis import (
+    BINS_HOUSEHOLD_COLUMN,
+    CAPEX_PER_BIN,
+    DISCOUNT_RATES,
+    EFFICIENCY_GAINS,
+    bins_needed,
+    npv_closed_form,
+)
+
+OUTPUT_FILE = PROJECT_ROOT / "outputs" / "task5_policy_variants.csv"
+
+BASE_DISCOUNT_RATE = 0.07
+BASE_EFFICIENCY_GAIN = 0.4
+
+
+@dataclass
+class PolicyVariant:
+    name: str
+    scope: str  # "lowrise" 或 "all"
+    share: float
+    districts: Optional[str] = None  # None 为全区；"MN03+MN10" 或 "top3"
+
+
+DEFAULT_VARIANTS = [
+    PolicyVariant("mandatory_all", "all", POLICY_ADOPTION_SHARE),
+    PolicyVariant("lowrise_only", "lowrise", POLICY_ADOPTION_SHARE),
+    PolicyVariant("lowrise_full", "lowrise", 1.0),
+    PolicyVariant("pilot_top3", "lowrise", POLICY_ADOPTION_SHARE, "top3"),
+]
+
+
+def parse_variant(spec: str) -> PolicyVariant:
+    """解析 `名称=范围:采用比例[:区列表]`。"""
+    name, _, rest = spec.partition("=")
+    parts = rest.split(":")
+    if not name or len(parts) not in (2, 3) or parts[0] not in {"lowrise", "all"}:
+        raise ValueError(f"无法解析政策方案：{spec}")
+    return PolicyVariant(name, parts[0], float(parts[1]), parts[2] if len(parts) == 3 else None)
+
+
+def variant_districts(variant: PolicyVariant, df: pd.DataFrame, steady_now: np.ndarray) -> np.ndarray:
+    """方案覆盖的区，返回 (区,) 布尔掩码。"""
+    if variant.districts is None:
+        return np.ones(len(df), dtype=bool)
+    if variant.districts.startswith("top"):
+        top = np.argsort(-steady_now)[: int(variant.districts[3:])]
+        return np.isin(np.arange(len(df)), top)
+    names = variant.districts.split("+")
+    unknown = set(names) - set(df["district"])
+    if unknown:
+        raise ValueError(f"未知区：{sorted(unknown)}")
+    return df["district"].isin(names).to_numpy()
+
+
+def variant_adoption(
+    variant: PolicyVariant, df: pd.DataFrame, current: np.ndarray, steady_now: np.ndarray
+) -> np.ndarray:
+    if variant.scope == "lowrise":
+        target = policy_adoption(df, variant.share)
+    else:
+        target = np.maximum(current, variant.share)
+    return np.where(variant_districts(variant, df, steady_now), target, current)
+
+
+def compare_variants(
+    df: pd.DataFrame,
+    variants: List[PolicyVariant],
+    params: ExposureParams,
+    method: str = "analytic",
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """返回方案汇总表与逐区明细（长表）。"""
+    current = df["bins_adoption"].to_numpy(dtype=float)
+    _, _, steady_now, trucks_now = adoption_response(df, current[:, None], params, method)
+    steady_now, trucks_now = steady_now[:, 0], trucks_now[:, 0]
+
+    # 所有方案的覆盖率列去重后一次求解
+    adoption = np.stack([variant_adoption(v, df, current, steady_now) for v in variants], axis=1)
+    unique, inverse = np.unique(adoption, axis=1, return_inverse=True)
+    _, _, steady_u, trucks_u = adoption_response(df, unique, params, method)
+    inverse = np.ravel(inverse)
+    steady, trucks = steady_u[:, inverse], trucks_u[:, inverse]
+
+    truck_saving = trucks_now[:, None] - trucks
+    rat_reduction = steady_now[:, None] - steady
+    households = df[BINS_HOUSEHOLD_COLUMN].to_numpy(dtype=float)
+    bins = bins_needed(households[:, None], adoption, current[:, None])
+
+    rates = np.asarray(DISCOUNT_RATES)[:, None]
+    gains = np.asarray(EFFICIENCY_GAINS)[None, :]
+    records = []
+    for k, variant in enumerate(variants):
+        total_truck, total_rat = truck_saving[:, k].sum(), rat_reduction[:, k].sum()
+        num_bins = bins[:, k].sum()
+        grid = npv_closed_form(total_truck, total_rat, rates, gains, num_bins=num_bins)
+        records.append(
+            {
+                "variant": variant.name,
+                "scope": variant.scope,
+                "adoption_share": variant.share,
+                "districts_covered": int((adoption[:, k] > current).sum()),
+                "bins_deployed": num_bins,
+                "capex": num_bins * CAPEX_PER_BIN,
+                "truck_saving": total_truck,
+                "rat_reduction": total_rat,
+                "npv_base": float(
+                    npv_closed_form(
+                        total_truck, total_rat, BASE_DISCOUNT_RATE, BASE_EFFICIENCY_GAIN, num_bins=num_bins
+                    )
+                ),
+                "npv_min": grid.min(),
+                "npv_max": grid.max(),
+            }
+        )
+
+    detail = pd.DataFrame(
+        {
+            "variant": np.repeat([v.name for v in variants], len(df)),
+            "district": np.tile(df["district"].to_numpy(), len(variants)),
+            "bins_adoption": adoption.T.ravel(),
+            "truck_saving": truck_saving.T.ravel(),
+            "rat_reduction": rat_reduction.T.ravel(),
+            "bins_deployed": bins.T.ravel(),
+        }
+    )
+    return pd.DataFrame(records), detail
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务5.4：Bins 政策方案批量比较")
+    parser.add_argument(
+        "--variant",
+        action="append",
+        default=[],
+        metavar="NAME=SCOPE:SHARE[:DISTRICTS]",
+        help="政策方案，可重复；省略时使用内置方案",
+    )
+    parser.add_argument("--method", choices=["analytic", "ode"], default="analytic")
+    parser.add_argument("--detail", action="store_true", help="同时打印逐区明细")
+    parser.add_argument("--output-file", type=Path, default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    variants = [parse_variant(spec) for spec in args.variant] or DEFAULT_VARIANTS
+    df = load_policy_inputs()
+    summary, detail = compare_variants(df, variants, ExposureParams(), args.method)
+
+    args.output_file.parent.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(args.output_file, index=False)
+    print(f"{len(variants)} 个方案 × {len(df)} 个区（{args.method}）")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:,.4g}"))
+    if args.detail:
+        print(detail.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+    print("已写入政策方案对照表：", args.output_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+DSNY 区域几何工具（无需 geopandas）
+--------------------------------------
+按 `fix_dsny_to_pickle.py` 的逐行方式从原始 DSNY CSV 中提取 WKT。
+原始文件中较长的 WKT 被截断成多行（续行不含 MULTIPOLYGON、以逗号补齐），
+这里把续行拼回所属区，并只提取完整的“经度 纬度”坐标对，断点处残缺的
+顶点直接丢弃。各区 MULTIPOLYGON 解析为坐标环数组后，提供：
+- `assign_districts`：向量化射线法点面判断，把经纬度映射到区；
+- `adjacency_matrix`：依据共享边界顶点构造区间邻接矩阵。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parents[1]
+RAW_PATH = PROJECT_ROOT / "data" / "raw" / "DSNY_Districts_20251026.csv"
+
+ADJACENCY_TOL_DEG = 1e-4  # 约 10 米，视为共享边界
+MIN_SHARED_VERTICES = 2
+
+# 纽约市范围内的经纬度对（经度 -73/-74，纬度 40）
+_COORD_PATTERN = re.compile(r"(-7[34]\.\d+)\s+(40\.\d+)")
+
+
+def _parse_rings(wkt_text: str) -> List[np.ndarray]:
+    rings = []
+    for piece in wkt_text.split(")"):
+        pairs = _COORD_PATTERN.findall(piece)
+        if len(pairs) >= 3:
+            rings.append(np.array(pairs, dtype=float))
+    return rings
+
+
+def load_district_polygons(
+    path: Path = RAW_PATH, prefixes: Optional[Sequence[str]] = None
+) -> Dict[str, List[np.ndarray]]:
+    """返回 {区代码: [环坐标数组 (n, 2)，经度在前]}，按区代码排序。"""
+    if not path.exists():
+        raise FileNotFoundError(f"找不到 DSNY 区域文件：{path}")
+
+    records: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+    with path.open("r", encoding="utf-8") as src:
+        next(src)  # 跳过表头
+        for line in src:
+            start = line.find("MULTIPOLYGON")
+            if start == -1:
+                # 续行：属于上一个区的 WKT 片段
+                if current is not None:
+                    current.append(line.rstrip().rstrip(","))
+                continue
+            parts = [p.strip().strip('"') for p in line[:start].split(",") if p.strip()]
+            district = parts[0] if parts else None
+            if district is None or (prefixes and not district.startswith(tuple(prefixes))):
+                current = None
+                continue
+            current = records.setdefault(district, [])
+            current.append(line[start:].rstrip().rstrip(","))
+
+    polygons = {
+        district: _parse_rings(" ".join(fragments)) for district, fragments in records.items()
+    }
+    polygons = {district: rings for district, rings in polygons.items() if rings}
+
+    if not polygons:
+        raise ValueError("未能从 DSNY 文件中解析出任何区域几何")
+    return dict(sorted(polygons.items()))
+
+
+def _points_in_rings(lon: np.ndarray, lat: np.ndarray, rings: List[np.ndarray]) -> np.ndarray:
+    """奇偶规则射线法：多环（含洞）统一按穿越次数奇偶判断。"""
+    inside = np.zeros(lon.shape, dtype=bool)
+    for ring in rings:
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        # 先用外包框筛掉不可能的点，减少 (点 × 边) 的广播规模
+        candidate = (
+            (lon >= x1.min()) & (lon <= x1.max()) & (lat >= y1.min()) & (lat <= y1.max())
+        )
+        if not candidate.any():
+            continue
+        px, py = lon[candidate, None], lat[candidate, None]
+        crosses = ((y1 > py) != (y2 > py)) & (
+            px < (x2 - x1) * (py - y1) / (y2 - y1 + 1e-300) + x1
+        )
+        inside[candidate] ^= (crosses.sum(axis=1) % 2).astype(bool)
+    return inside
+
+
+def assign_districts(
+    lon: np.ndarray, lat: np.ndarray, polygons: Dict[str, List[np.ndarray]], chunk: int = 20_000
+) -> np.ndarray:
+    """把坐标映射到所在区，落在所有区之外的点返回空字符串。"""
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    result = np.full(lon.shape, "", dtype=object)
+    for begin in range(0, len(lon), chunk):
+        sl = slice(begin, begin + chunk)
+        for district, rings in polygons.items():
+            unassigned = result[sl] == ""
+            hit = _points_in_rings(lon[sl], lat[sl], rings) & unassigned
+            result[sl][hit] = district
+    return result
+
+
+def adjacency_matrix(
+    polygons: Dict[str, List[np.ndarray]],
+    tol: float = ADJACENCY_TOL_DEG,
+    min_shared: int = MIN_SHARED_VERTICES,
+):
+    """共享边界顶点数达到 min_shared 的区视为相邻，返回稀疏对称 0/1 矩阵。"""
+    from scipy import sparse
+    from scipy.spatial import cKDTree
+
+    names = list(polygons)
+    vertices = [np.concatenate(polygons[name]) for name in names]
+    owner = np.concatenate([np.full(len(v), i) for i, v in enumerate(vertices)])
+    tree = cKDTree(np.concatenate(vertices))
+    pairs = tree.query_pairs(tol, output_type="ndarray")
+
+    a, b = owner[pairs[:, 0]], owner[pairs[:, 1]]
+    cross = a != b
+    counts = sparse.coo_matrix(
+        (np.ones(cross.sum()), (a[cross], b[cross])), shape=(len(names), len(names))
+    ).tocsr()
+    counts = counts + counts.T
+    adjacency = (counts >= min_shared).astype(float)
+    adjacency.eliminate_zeros()
+    return adjacency
@@ -3,18 +3,22 @@
 """
 
 from pathlib import Path
+import sys
 
 import matplotlib.pyplot as plt
-import pandas as pd
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_FILE = PROJECT_ROOT / "outputs" / "task3_resilience_comparison.csv"
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.models.results_io import read_table
+
+DATA_FILE = PROJECT_ROOT / "outputs" / "task3_resilience_comparison.parquet"
 OUTPUT_DIR = PROJECT_ROOT / "outputs" / "figures"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def main():
-    df = pd.read_csv(DATA_FILE)
+    df = read_table(DATA_FILE, columns=["strategy", "min_service_ratio", "mad"])
     plt.figure(figsize=(6, 5))
     for strategy, subdf in df.groupby("strategy"):
         plt.scatter(
@@ -5,10 +5,12 @@
 from pathlib import Path
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_FILE = PROJECT_ROOT / "outputs" / "task5_npv_sensitivity.csv"
+SURFACE_FILE = PROJECT_ROOT / "outputs" / "task5_npv_surface.npz"
 OUTPUT_DIR = PROJECT_ROOT / "outputs" / "figures"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -34,6 +36,27 @@ def main():
     plt.close()
     print("已生成 task5_2_npv_heatmap.png")
 
+    if SURFACE_FILE.exists():
+        plot_surface()
+
+
+def plot_surface():
+    data = np.load(SURFACE_FILE)
+    discount, efficiency = data["discount_rate"], data["efficiency_gain"]
+
+    plt.figure(figsize=(6, 4))
+    plt.pcolormesh(efficiency, discount, data["npv"] / 1e6, cmap="RdYlGn", shading="auto")
+    plt.colorbar(label="NPV (million USD)")
+    plt.plot(data["break_even_efficiency"], discount, color="black", linewidth=1.5, label="NPV = 0")
+    plt.xlabel("Efficiency Gain")
+    plt.ylabel("Discount Rate")
+    plt.title("Task 5.2: NPV Surface and Break-even")
+    plt.legend(loc="upper left")
+    plt.tight_layout()
+    plt.savefig(OUTPUT_DIR / "task5_2_npv_surface.png", dpi=300)
+    plt.close()
+    print("已生成 task5_2_npv_surface.png")
+
 
 if __name__ == "__main__":
     main()